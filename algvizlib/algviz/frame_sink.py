@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+
+'''
+@author:zjluestc@outlook.com
+@license:GPLv3
+'''
+
+import os
+import re
+
+import svg_table
+import utility as util
+
+'''
+将每一帧中所有可视化对象的SVG保存为目录中编号的文件（{帧序号}_{对象序号}.svg）。
+'''
+class SvgDirSink():
+    '''
+    path:str 保存帧的目录。
+    '''
+    def __init__(self, path):
+        self._path = path
+        self._next_frame = 0
+        os.makedirs(path, exist_ok=True)
+
+    '''
+    frames:list((name, kind, content)) 该帧中每个对象的名称、内容类型('svg'/'text')和内容。
+    delay:float 该帧的动画延时。
+    '''
+    def write(self, frames, delay):
+        for i in range(len(frames)):
+            (_, kind, content) = frames[i]
+            suffix = 'svg' if kind == 'svg' else 'txt'
+            file_name = os.path.join(self._path, '{:05d}_{:02d}.{}'.format(self._next_frame, i, suffix))
+            with open(file_name, 'w', encoding='utf-8') as f:
+                f.write(content)
+        self._next_frame += 1
+
+    def close(self):
+        pass
+
+_html_header = '''<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+body {{ font-family: Times, serif; }}
+.algviz-bar {{ margin: 8px 0; }}
+.algviz-name {{ font-size: 14px; margin: 6px 0 2px 4px; }}
+pre {{ margin: 0 0 0 4px; }}
+</style>
+<script>
+document.addEventListener('DOMContentLoaded', function() {{
+    var frames = document.getElementsByTagName('template');
+    var stage = document.getElementById('algviz-stage');
+    var info = document.getElementById('algviz-info');
+    var cur = 0, timer = null;
+    function show(i) {{
+        cur = Math.max(0, Math.min(i, frames.length - 1));
+        stage.innerHTML = '';
+        stage.appendChild(frames[cur].content.cloneNode(true));
+        info.textContent = (cur + 1) + '/' + frames.length;
+    }}
+    function play() {{
+        if (cur + 1 >= frames.length) {{ timer = null; return; }}
+        timer = setTimeout(function() {{ show(cur + 1); play(); }}, parseFloat(frames[cur].dataset.delay) * 1000);
+    }}
+    function stop() {{ if (timer !== null) {{ clearTimeout(timer); timer = null; }} }}
+    document.getElementById('algviz-prev').onclick = function() {{ stop(); show(cur - 1); }};
+    document.getElementById('algviz-next').onclick = function() {{ stop(); show(cur + 1); }};
+    document.getElementById('algviz-play').onclick = function() {{ stop(); if (cur + 1 >= frames.length) show(0); play(); }};
+    if (frames.length > 0) show(0);
+}});
+</script>
+</head>
+<body>
+<div class="algviz-bar"><button id="algviz-prev">&lt;</button> <button id="algviz-play">&#9654;</button> <button id="algviz-next">&gt;</button> <span id="algviz-info"></span></div>
+<div id="algviz-stage"></div>
+'''
+
+'''
+将所有帧写入一个独立的HTML播放器文件中（每一帧追加写入，不需要等待算法结束）。
+'''
+class HtmlSink():
+    '''
+    path:str HTML文件路径。
+    title:str 页面标题。
+    '''
+    def __init__(self, path, title='algviz'):
+        self._file = open(path, 'w', encoding='utf-8')
+        self._file.write(_html_header.format(title=util.xml_escape(title)))
+        self._file.flush()
+
+    '''
+    frames:list((name, kind, content)) 该帧中每个对象的名称、内容类型('svg'/'text')和内容。
+    delay:float 该帧的动画延时。
+    '''
+    def write(self, frames, delay):
+        res = ['<template data-delay="{:.2f}">'.format(delay)]
+        for (name, kind, content) in frames:
+            if name is not None:
+                res.append('<div class="algviz-name">{}:</div>'.format(util.xml_escape('{}'.format(name))))
+            if kind == 'svg':
+                if content.startswith('<?xml'):
+                    content = content[content.find('?>')+2:]
+                res.append('<div>{}</div>'.format(content))
+            else:
+                res.append('<pre>{}</pre>'.format(util.xml_escape(content)))
+        res.append('</template>\n')
+        self._file.write(''.join(res))
+        self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self._file.write('</body>\n</html>\n')
+            self._file.close()
+
+'''
+output:str/SvgDirSink/HtmlSink 输出路径（以.html结尾时输出为HTML播放器，否则输出到目录）或输出对象。
+返回：帧输出对象。
+'''
+def create_sink(output):
+    if not isinstance(output, str):
+        return output
+    if output.lower().endswith('.html') or output.lower().endswith('.htm'):
+        return HtmlSink(output)
+    return SvgDirSink(output)
+
+'''
+功能：将一个对象的多帧SVG合并为一个SVG，每一帧只在自己的时间段内显示，浏览器可以连续播放所有帧的动画。
+frames:list((begin, dur, svg)) 每一帧的开始时间、持续时间和SVG字符串（帧内动画的开始时间需已偏移begin）。
+返回：str 合并后的SVG字符串。
+'''
+def merge_svg_frames(frames):
+    width, height = 0, 0
+    body = list()
+    for i in range(len(frames)):
+        (begin, _, svg) = frames[i]
+        svg = svg[svg.find('<svg'):]
+        size = _svg_size_(svg)
+        width, height = max(width, size[0]), max(height, size[1])
+        if i + 1 < len(frames):
+            show = '<set attributeName="opacity" to="1" begin="{:.2f}s" dur="{:.2f}s"/>'.format(begin, frames[i+1][0]-begin)
+        else:
+            show = '<set attributeName="opacity" to="1" begin="{:.2f}s" fill="freeze"/>'.format(begin)
+        body.append('<g style="opacity:0">{}{}</g>'.format(show, svg))
+    # 内层SVG的尺寸单位为pt，外层viewBox使用px为单位（1pt=4/3px）以保持原始比例。
+    head = '<svg width="{:.0f}pt" height="{:.0f}pt" viewBox="0.00 0.00 {:.2f} {:.2f}" xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink">'.format(
+        width, height, width*4/3, height*4/3)
+    return head + ''.join(body) + '</svg>'
+
+_begin_pattern = re.compile(r'begin="(-?\d+(?:\.\d+)?)s"')
+
+'''
+功能：将SVG中所有动画的开始时间偏移一段时间（开始时间可以为负数，表示动画已经播放了一段时间）。
+svg:str SVG字符串。
+offset:float 偏移的时长。
+返回：str 偏移后的SVG字符串。
+'''
+def shift_svg_begin(svg, offset):
+    if offset == 0:
+        return svg
+    return _begin_pattern.sub(lambda m: 'begin="{:.2f}s"'.format(_round_time_(float(m.group(1)) + offset)), svg)
+
+'''
+返回：float 保留两位小数的时间（避免输出-0.00）。
+'''
+def _round_time_(t):
+    return round(t, 2) + 0.0
+
+'''
+text:str 要显示的文本内容。
+返回：str 逐行显示文本的SVG字符串。
+'''
+def text_svg(text):
+    lines = text.split('\n')
+    width = max([util.text_char_num(line) for line in lines] + [1]) * 8 + 8
+    svg = svg_table.SvgTable(width, 17*len(lines)+4)
+    for i in range(len(lines)):
+        svg.add_text_element((4, 17*(i+1)), lines[i], font_size=14, fill=(0,0,0))
+    return svg._repr_svg_()
+
+'''
+svg:str SVG字符串。
+返回：(width, height) 根元素的尺寸（pt）。
+'''
+def _svg_size_(svg):
+    root = svg[:svg.find('>')]
+    size = list()
+    for attr in ('width="', 'height="'):
+        st = root.find(attr)
+        if st == -1:
+            size.append(0)
+            continue
+        st += len(attr)
+        value = root[st:root.find('"', st)]
+        size.append(float(value.rstrip('ptx')))
+    return size
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+
+'''
+@author:zjluestc@outlook.com
+@license:GPLv3
+'''
+
+import math
+import re
+
+import utility as util
+
+_graph_margin = 4       # 拓扑图四周的边距（与graphviz输出的SVG一致）。
+_arrow_len = 10         # 箭头的长度。
+_arrow_width = 3.5      # 箭头的半宽度。
+
+_plain_token = re.compile(r'"((?:[^"\\]|\\.)*)"|(\S+)')
+
+'''
+拓扑图的排版结果：节点位置和边的路径（坐标单位为pt，y轴向上，原点在排版区域的左下角）。
+'''
+class GraphLayout():
+    '''
+    width/height:float 排版区域的宽度和高度。
+    '''
+    def __init__(self, width=0, height=0):
+        self.width = width          # 排版区域的宽度。
+        self.height = height        # 排版区域的高度。
+        self.nodes = dict()         # 节点id到(x, y, 半径)的映射关系。
+        self.edges = dict()         # (起点id，终点id)到(贝塞尔曲线控制点列表，标签位置)的映射关系，标签位置可以为None。
+
+    '''
+    node_id:int 节点id。
+    返回：(x, y) 节点中心在SVG中的绝对坐标。
+    '''
+    def node_pos(self, node_id):
+        (x, y, _) = self.nodes[node_id]
+        return (x + _graph_margin, self.height - y + _graph_margin)
+
+'''
+功能：解析graphviz的plain格式输出（-Tplain）。
+text:str graphviz的plain格式输出。
+返回：GraphLayout 排版结果（节点和边以DOT源码中节点的名称转换为整数后作为id）。
+'''
+def parse_plain(text):
+    layout = GraphLayout()
+    for line in text.splitlines():
+        tokens = [q if q or not t else t for (q, t) in _plain_token.findall(line)]
+        if len(tokens) == 0:
+            continue
+        if tokens[0] == 'graph':
+            (layout.width, layout.height) = (float(tokens[2])*72, float(tokens[3])*72)
+        elif tokens[0] == 'node':
+            radius = max(float(tokens[4]), float(tokens[5]))*36
+            layout.nodes[int(tokens[1])] = (float(tokens[2])*72, float(tokens[3])*72, radius)
+        elif tokens[0] == 'edge':
+            count = int(tokens[3])
+            values = tokens[4:4+count*2]
+            points = [(float(values[i])*72, float(values[i+1])*72) for i in range(0, len(values), 2)]
+            rest = tokens[4+count*2:]
+            label_pos = None
+            if len(rest) > 2:
+                label_pos = (float(rest[1])*72, float(rest[2])*72)
+            layout.edges[(int(tokens[1]), int(tokens[2]))] = (points, label_pos)
+        elif tokens[0] == 'stop':
+            break
+    return layout
+
+'''
+功能：根据排版结果生成与graphviz输出结构相同的SVG字符串（graph0, node{id}, edge{id}）。
+layout:GraphLayout 排版结果。
+nodes:list 按拓扑顺序排列的所有节点。
+edges:dict 所有的边（（起点，终点）：边上的标签）。
+node_idmap:ConsecutiveIdMap 节点和排版结果中节点id之间的映射关系。
+directed:bool 是否为有向图。
+返回：str SVG字符串。
+'''
+def layout_svg(layout, nodes, edges, node_idmap, directed):
+    (width, height) = (layout.width, layout.height)
+    res = list()
+    res.append('<svg width="{:.0f}pt" height="{:.0f}pt" viewBox="0.00 0.00 {:.2f} {:.2f}" xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink">'.format(
+        width+_graph_margin*2, height+_graph_margin*2, width+_graph_margin*2, height+_graph_margin*2))
+    res.append('<g id="graph0" class="graph" transform="scale(1 1) rotate(0) translate({} {:.2f})">'.format(_graph_margin, height+_graph_margin))
+    res.append('<polygon fill="white" stroke="transparent" points="{l},{b} {l},{t:.2f} {r:.2f},{t:.2f} {r:.2f},{b} {l},{b}"/>'.format(
+        l=-_graph_margin, b=_graph_margin, t=-height-_graph_margin, r=width+_graph_margin))
+    # 节点坐标转换为graphviz的SVG坐标系（y轴向下，原点在左下角）。
+    centers = dict()
+    for node in nodes:
+        (x, y, radius) = layout.nodes[node_idmap.toConsecutiveId(node)]
+        y = -y
+        centers[node] = (x, y, radius)
+        label = str(node)
+        font_size = min(14, util.text_font_size(32, label))
+        res.append('<g id="node{}" class="node">'.format(node_idmap.toConsecutiveId(node)))
+        res.append('<ellipse fill="none" stroke="#7b7b7b" cx="{:.2f}" cy="{:.2f}" rx="{:g}" ry="{:g}"/>'.format(
+            x, y, radius, radius))
+        res.append('<text text-anchor="middle" x="{:.2f}" y="{:.2f}" font-family="Times,serif" font-size="{:.2f}">{}</text>'.format(
+            x, y + font_size*0.27, font_size, util.xml_escape(label)))
+        res.append('</g>')
+    edge_id = 1
+    for (node1, node2) in edges.keys():
+        res.append('<g id="edge{}" class="edge">'.format(edge_id))
+        (id1, id2) = (node_idmap.toConsecutiveId(node1), node_idmap.toConsecutiveId(node2))
+        (points, label_pos) = (None, None)
+        if (id1, id2) in layout.edges:
+            (points, label_pos) = layout.edges[(id1, id2)]
+        elif not directed and (id2, id1) in layout.edges:
+            (points, label_pos) = layout.edges[(id2, id1)]
+            points = points[::-1]
+        if points is not None and len(points) >= 4:
+            points = [(x, -y) for (x, y) in points]
+            res.append(_spline_svg_(points, centers[node2], directed))
+        else:
+            res.append(edge_svg(centers[node1], centers[node2], directed))
+        label = edges[(node1, node2)]
+        if label is not None:
+            if label_pos is not None:
+                (lx, ly) = (label_pos[0], -label_pos[1])
+            else:
+                (x1, y1, _), (x2, y2, _) = centers[node1], centers[node2]
+                (lx, ly) = ((x1+x2)*0.5, (y1+y2)*0.5)
+            res.append('<text text-anchor="middle" x="{:.2f}" y="{:.2f}" font-family="Times,serif" font-size="12.00" fill="#c0c0c0">{}</text>'.format(
+                lx, ly, util.xml_escape('{}'.format(label))))
+        res.append('</g>')
+        edge_id += 1
+    res.append('</g></svg>')
+    return ''.join(res)
+
+'''
+功能：两个节点之间的直线边（以三次贝塞尔曲线表示）。
+start/end:(x, y, 半径) 边的起点和终点节点的圆心坐标和半径。
+directed:bool 是否绘制箭头。
+返回：str 边的路径（和箭头）的SVG字符串。
+'''
+def edge_svg(start, end, directed):
+    (x1, y1, r1), (x2, y2, r2) = start, end
+    dist = math.hypot(x2-x1, y2-y1)
+    if dist < 0.001:
+        ux, uy = 0, 1
+    else:
+        ux, uy = (x2-x1)/dist, (y2-y1)/dist
+    # 边从起点圆的边界出发，到终点圆的边界（或箭头的根部）为止。
+    sx, sy = x1 + ux*r1, y1 + uy*r1
+    tip_x, tip_y = x2 - ux*r2, y2 - uy*r2
+    ex, ey = tip_x, tip_y
+    if directed:
+        ex, ey = tip_x - ux*_arrow_len, tip_y - uy*_arrow_len
+    res = '<path fill="none" stroke="#7b7b7b" d="M{:.2f},{:.2f}C{:.2f},{:.2f} {:.2f},{:.2f} {:.2f},{:.2f}"/>'.format(
+        sx, sy, sx+(ex-sx)/3, sy+(ey-sy)/3, sx+(ex-sx)*2/3, sy+(ey-sy)*2/3, ex, ey)
+    if directed:
+        res += _arrow_svg_(tip_x, tip_y, ux, uy)
+    return res
+
+'''
+功能：graphviz排版的曲线边，有向边在曲线末端沿切线方向补充箭头。
+points:list((x, y)) 贝塞尔曲线的控制点（SVG坐标系）。
+end:(x, y, 半径) 终点节点的圆心坐标和半径。
+directed:bool 是否绘制箭头。
+返回：str 边的路径（和箭头）的SVG字符串。
+'''
+def _spline_svg_(points, end, directed):
+    res = '<path fill="none" stroke="#7b7b7b" d="M{:.2f},{:.2f}C{}"/>'.format(
+        points[0][0], points[0][1], ' '.join('{:.2f},{:.2f}'.format(x, y) for (x, y) in points[1:]))
+    if directed:
+        (bx, by) = points[-1]
+        (px, py) = points[-2]
+        dist = math.hypot(bx-px, by-py)
+        if dist < 0.001:
+            (px, py) = (end[0], end[1])
+            dist = math.hypot(px-bx, py-by)
+            (ux, uy) = ((px-bx)/dist, (py-by)/dist) if dist > 0.001 else (0, 1)
+        else:
+            (ux, uy) = ((bx-px)/dist, (by-py)/dist)
+        res += _arrow_svg_(bx + ux*_arrow_len, by + uy*_arrow_len, ux, uy)
+    return res
+
+'''
+tip_x/tip_y:float 箭头尖端的坐标。
+ux/uy:float 箭头方向的单位向量。
+返回：str 箭头的SVG字符串。
+'''
+def _arrow_svg_(tip_x, tip_y, ux, uy):
+    bx, by = tip_x - ux*_arrow_len, tip_y - uy*_arrow_len
+    nx, ny = tip_x - ux*_arrow_len*0.6, tip_y - uy*_arrow_len*0.6
+    return '<polygon fill="#7b7b7b" stroke="#7b7b7b" points="{:.2f},{:.2f} {:.2f},{:.2f} {:.2f},{:.2f} {:.2f},{:.2f} {:.2f},{:.2f}"/>'.format(
+        tip_x, tip_y, bx-uy*_arrow_width, by+ux*_arrow_width, nx, ny, bx+uy*_arrow_width, by-ux*_arrow_width, tip_x, tip_y)
@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+
+'''
+@author:zjluestc@outlook.com
+@license:GPLv3
+'''
+
+import math
+
+import graph_layout
+
+_node_radius = 18       # 新节点圆的半径（与graphviz中circle节点的默认尺寸一致）。
+_edge_len = 72          # 相邻节点中心之间的理想距离（与graphviz相邻两层之间的距离接近）。
+_node_sep = 54          # 节点中心之间的最小距离。
+_iterations = 40        # 局部优化的迭代次数。
+_anchor = 0.5           # 已有节点被拉回原位置的强度。
+_snap = 2               # 局部优化后移动距离小于该值的已有节点恢复到原位置（保留原来的边路径）。
+_min_change = 16        # 变化的节点数不超过该值时总是使用增量排版。
+_max_change = 0.2       # 变化的节点数超过全部节点的该比例时使用graphviz重新排版。
+
+'''
+节点位置的网格索引（网格边长为节点之间的最小距离），用于查找一个位置附近的节点。
+'''
+class _Grid():
+    '''
+    pos:dict 节点到位置[x, y]的映射关系（与排版过程共用）。
+    '''
+    def __init__(self, pos):
+        self._pos = pos         # 节点的当前位置。
+        self._cells = dict()    # 网格坐标到该网格中节点集合的映射关系。
+        for node in pos.keys():
+            self.add(node)
+
+    def add(self, node):
+        self._cells.setdefault(self._key_(self._pos[node]), set()).add(node)
+
+    def remove(self, node):
+        cell = self._cells.get(self._key_(self._pos[node]))
+        if cell is not None:
+            cell.discard(node)
+
+    '''
+    point:[x, y] 查找的位置。
+    返回：generator 该位置所在网格及其周围八个网格中的节点。
+    '''
+    def near(self, point):
+        (cx, cy) = self._key_(point)
+        for gx in range(cx-1, cx+2):
+            for gy in range(cy-1, cy+2):
+                cell = self._cells.get((gx, gy))
+                if cell is not None:
+                    yield from cell
+
+    def _key_(self, point):
+        return (math.floor(point[0]/_node_sep), math.floor(point[1]/_node_sep))
+
+'''
+功能：在上一帧排版结果的基础上进行增量排版。已有节点保持原来的位置，新节点放在相邻节点旁边，
+只在变化的节点及其相邻节点的范围内做局部优化，优化的计算量与变化的规模相关而不是整个图的规模。
+old_layout:GraphLayout 上一帧的排版结果。
+old_idmap:ConsecutiveIdMap 上一帧节点和排版结果中节点id之间的映射关系。
+old_edges:iterable 上一帧所有的边（起点，终点）。
+nodes:list 按拓扑顺序排列的所有节点。
+edges:dict 所有的边（（起点，终点）：边上的标签）。
+node_idmap:ConsecutiveIdMap 节点和新排版结果中节点id之间的映射关系。
+directed:bool 是否为有向图。
+horizontal:bool 是否横向排版。
+返回：GraphLayout 排版结果（位置变化的节点相连的边没有路径信息），没有可用的上一帧排版结果或变化过大时返回None。
+'''
+def relayout(old_layout, old_idmap, old_edges, nodes, edges, node_idmap, directed, horizontal=False):
+    if old_layout is None or len(old_layout.nodes) == 0:
+        return None
+    # 沿用已有节点在上一帧中的位置。
+    pos = dict()
+    radius = dict()
+    new_nodes = list()
+    for node in nodes:
+        old_id = old_idmap._attr2id.get(node)
+        if old_id is not None and old_id in old_layout.nodes:
+            (x, y, r) = old_layout.nodes[old_id]
+            pos[node] = [x, y]
+            radius[node] = r
+        else:
+            new_nodes.append(node)
+            radius[node] = _node_radius
+    if len(pos) == 0:
+        return None
+    # 新节点和增删的边的端点是发生变化的节点。
+    old_edges = set(old_edges)
+    seeds = set(new_nodes)
+    for edge in edges.keys():
+        if edge not in old_edges:
+            seeds.update(edge)
+    for edge in old_edges:
+        if edge not in edges:
+            seeds.update(node for node in edge if node in radius)
+    if len(seeds) > max(_min_change, len(nodes)*_max_change):
+        return None
+    (succ, pred) = _adjacency_(edges, directed)
+    grid = _Grid(pos)
+    for node in new_nodes:
+        pos[node] = _free_position_(_initial_position_(node, pos, succ, pred, horizontal), pos, grid)
+        grid.add(node)
+    # 变化的节点和与它们相邻的节点参与局部优化，其它节点保持不动。
+    movable = [node for node in nodes if node in seeds]
+    neighbors = set()
+    for node in movable:
+        neighbors.update(succ.get(node, ()))
+        neighbors.update(pred.get(node, ()))
+    movable += [node for node in nodes if node in neighbors and node not in seeds]
+    origin = dict()
+    for node in movable:
+        if node not in new_nodes:
+            origin[node] = tuple(pos[node])
+    _optimize_(movable, origin, pos, grid, succ, pred, directed, horizontal)
+    moved = set(new_nodes)
+    for (node, (x, y)) in origin.items():
+        if math.hypot(pos[node][0] - x, pos[node][1] - y) < _snap:
+            pos[node] = [x, y]
+        else:
+            moved.add(node)
+    return _build_layout_(old_layout, old_idmap, nodes, edges, node_idmap, directed, pos, radius, moved)
+
+'''
+edges:dict 所有的边。
+directed:bool 是否为有向图。
+返回：(dict, dict) 节点到后继节点列表和前驱节点列表的映射关系（无向图中两者是同一个字典）。
+'''
+def _adjacency_(edges, directed):
+    succ = dict()
+    pred = dict() if directed else succ
+    for (node1, node2) in edges.keys():
+        if node1 is node2:
+            continue
+        succ.setdefault(node1, list()).append(node2)
+        pred.setdefault(node2, list()).append(node1)
+    return (succ, pred)
+
+'''
+功能：新节点的初始位置，放在已放置的前驱节点的下一层（或后继节点的上一层），没有已放置的相邻节点时放在图的右侧。
+返回：[x, y] 初始位置。
+'''
+def _initial_position_(node, pos, succ, pred, horizontal):
+    parents = [pos[p] for p in pred.get(node, ()) if p in pos]
+    if len(parents) > 0:
+        return _next_rank_(parents, True, horizontal)
+    children = [pos[c] for c in succ.get(node, ()) if c in pos]
+    if len(children) > 0:
+        return _next_rank_(children, False, horizontal)
+    right = max(p[0] for p in pos.values())
+    top = max(p[1] for p in pos.values())
+    return [right + _edge_len, top]
+
+'''
+anchors:list([x, y]) 相邻节点的位置。
+forward:bool 是否沿排版方向放在相邻节点之后（纵向排版时向下，横向排版时向右）。
+horizontal:bool 是否横向排版。
+返回：[x, y] 相邻节点的中心位置沿排版方向移动一层后的位置。
+'''
+def _next_rank_(anchors, forward, horizontal):
+    x = sum(p[0] for p in anchors)/len(anchors)
+    y = sum(p[1] for p in anchors)/len(anchors)
+    if horizontal:
+        x = max(p[0] for p in anchors) + _edge_len if forward else min(p[0] for p in anchors) - _edge_len
+    else:
+        y = min(p[1] for p in anchors) - _edge_len if forward else max(p[1] for p in anchors) + _edge_len
+    return [x, y]
+
+'''
+功能：在目标位置附近查找一个与其它节点保持最小距离的位置（在同一层中向两侧交替查找）。
+target:[x, y] 目标位置。
+pos:dict 已放置节点的位置。
+grid:_Grid 已放置节点的网格索引。
+返回：[x, y] 空闲的位置。
+'''
+def _free_position_(target, pos, grid):
+    step = 0
+    while True:
+        offset = (step + 1)//2*_node_sep*(1 if step % 2 else -1)
+        candidate = [target[0] + offset, target[1]]
+        if candidate[0] < _node_radius:
+            step += 1
+            continue
+        for other in grid.near(candidate):
+            if math.hypot(pos[other][0] - candidate[0], pos[other][1] - candidate[1]) < _node_sep:
+                break
+        else:
+            return candidate
+        step += 1
+
+'''
+功能：对参与优化的节点做若干次力导向迭代。新节点受到边的弹簧力（有向图中还保持在前驱节点的下一层），
+已有节点只受到回到原位置的拉力，新节点受到附近所有节点的斥力，已有节点只在靠近新节点时被推开。
+附近的节点通过网格索引查找，每次迭代只访问参与优化的节点。
+movable:list 参与优化的节点。
+origin:dict 参与优化的已有节点在上一帧中的位置。
+pos:dict 所有节点的位置（直接更新）。
+grid:_Grid 所有节点的网格索引（直接更新）。
+'''
+def _optimize_(movable, origin, pos, grid, succ, pred, directed, horizontal):
+    temperature = _node_sep*0.5
+    repulse = _node_sep*1.2
+    fresh = set(node for node in movable if node not in origin)
+    for _ in range(_iterations):
+        for node in movable:
+            p = pos[node]
+            (fx, fy) = (0.0, 0.0)
+            if node in origin:
+                fx += (origin[node][0] - p[0])*_anchor
+                fy += (origin[node][1] - p[1])*_anchor
+            else:
+                adjacent = succ.get(node, ())
+                if directed:
+                    adjacent = list(adjacent) + pred.get(node, list())
+                for other in adjacent:
+                    (dx, dy) = (pos[other][0] - p[0], pos[other][1] - p[1])
+                    dist = max(math.hypot(dx, dy), 0.01)
+                    force = (dist - _edge_len)/dist*0.1
+                    fx += dx*force
+                    fy += dy*force
+                if directed:
+                    (lx, ly) = _rank_force_(node, p, pos, succ, pred, horizontal)
+                    fx += lx
+                    fy += ly
+            for other in grid.near(p):
+                if other is node or (node in origin and other not in fresh):
+                    continue
+                (dx, dy) = (p[0] - pos[other][0], p[1] - pos[other][1])
+                dist = math.hypot(dx, dy)
+                if dist >= repulse:
+                    continue
+                if dist < 0.01:
+                    (dx, dy, dist) = (1.0, 0.0, 1.0)
+                force = (repulse - dist)/dist*0.5
+                fx += dx*force
+                fy += dy*force
+            length = math.hypot(fx, fy)
+            if length < 0.01:
+                continue
+            if length > temperature:
+                (fx, fy) = (fx*temperature/length, fy*temperature/length)
+            grid.remove(node)
+            p[0] += fx
+            p[1] += fy
+            if node in fresh:
+                # 新节点不进入排版区域的左侧，避免整个图向右平移。
+                p[0] = max(p[0], _node_radius)
+            grid.add(node)
+        temperature *= 0.92
+
+'''
+返回：(fx, fy) 使节点与前驱节点和后继节点保持至少一层距离的力。
+'''
+def _rank_force_(node, p, pos, succ, pred, horizontal):
+    axis = 0 if horizontal else 1
+    # 纵向排版时层次沿y轴负方向（y轴向上）延伸，横向排版时沿x轴正方向延伸。
+    sign = 1 if horizontal else -1
+    min_gap = _edge_len*0.8
+    force = 0.0
+    for parent in pred.get(node, ()):
+        gap = (p[axis] - pos[parent][axis])*sign
+        if gap < min_gap:
+            force += (min_gap - gap)*0.2*sign
+    for child in succ.get(node, ()):
+        gap = (pos[child][axis] - p[axis])*sign
+        if gap < min_gap:
+            force -= (min_gap - gap)*0.2*sign
+    return (force, 0.0) if horizontal else (0.0, force)
+
+'''
+功能：生成排版结果，两个端点都没有移动的边沿用上一帧的路径，其它边使用节点之间的直线；
+节点超出排版区域的左侧或下方时整体平移（图向右或向下扩展时已有节点在SVG中的位置不变）。
+moved:set 位置发生变化的节点（包括新节点）。
+返回：GraphLayout 排版结果。
+'''
+def _build_layout_(old_layout, old_idmap, nodes, edges, node_idmap, directed, pos, radius, moved):
+    paths = dict()
+    for (node1, node2) in edges.keys():
+        if node1 in moved or node2 in moved:
+            continue
+        (old1, old2) = (old_idmap._attr2id.get(node1), old_idmap._attr2id.get(node2))
+        key = (node_idmap.toConsecutiveId(node1), node_idmap.toConsecutiveId(node2))
+        if (old1, old2) in old_layout.edges:
+            paths[key] = old_layout.edges[(old1, old2)]
+        elif not directed and (old2, old1) in old_layout.edges:
+            paths[key[::-1]] = old_layout.edges[(old2, old1)]
+    min_x = min(pos[node][0] - radius[node] for node in nodes)
+    min_y = min(pos[node][1] - radius[node] for node in nodes)
+    max_x = max(pos[node][0] + radius[node] for node in nodes)
+    max_y = max(pos[node][1] + radius[node] for node in nodes)
+    for (points, label_pos) in paths.values():
+        for (x, y) in points:
+            (min_x, min_y, max_x, max_y) = (min(min_x, x), min(min_y, y), max(max_x, x), max(max_y, y))
+    shift_x = -min_x if min_x < 0 else 0
+    shift_y = -min_y if min_y < 0 else 0
+    res = graph_layout.GraphLayout(max_x + shift_x, max_y + shift_y)
+    for node in nodes:
+        (x, y) = pos[node]
+        res.nodes[node_idmap.toConsecutiveId(node)] = (x + shift_x, y + shift_y, radius[node])
+    for (key, (points, label_pos)) in paths.items():
+        if shift_x != 0 or shift_y != 0:
+            points = [(x + shift_x, y + shift_y) for (x, y) in points]
+            if label_pos is not None:
+                label_pos = (label_pos[0] + shift_x, label_pos[1] + shift_y)
+        res.edges[key] = (points, label_pos)
+    return res
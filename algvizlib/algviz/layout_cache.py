@@ -0,0 +1,309 @@
+#!/usr/bin/env python3
+
+'''
+@author:zjluestc@outlook.com
+@license:GPLv3
+'''
+
+import atexit
+import collections
+import concurrent.futures
+import hashlib
+import os
+import tempfile
+import threading
+
+import graphviz
+
+import layout_pool
+
+_disk_suffixes = ('.svg', '.plain')    # 磁盘缓存文件的后缀名（与graphviz的输出格式对应）。
+
+'''
+以DOT源码为键缓存graphviz的排版结果（最近最少使用的结果会被淘汰）。
+'''
+class LayoutCache():
+    '''
+    capacity:int 最多缓存的排版结果数量。
+    '''
+    def __init__(self, capacity=256):
+        self._capacity = capacity
+        self._results = collections.OrderedDict()   # 排版键值到排版结果的映射（按访问时间排序）。
+
+    '''
+    key:str 排版键值。
+    返回：str 缓存的排版结果，没有缓存时返回None。
+    '''
+    def get(self, key):
+        if key not in self._results:
+            return None
+        self._results.move_to_end(key)
+        return self._results[key]
+
+    '''
+    key:str 排版键值。
+    result:str graphviz的排版结果。
+    '''
+    def put(self, key, result):
+        if self._capacity <= 0:
+            return
+        self._results[key] = result
+        self._results.move_to_end(key)
+        while len(self._results) > self._capacity:
+            self._results.popitem(last=False)
+
+    '''
+    capacity:int 新的最大缓存数量。
+    '''
+    def resize(self, capacity):
+        self._capacity = capacity
+        while len(self._results) > max(capacity, 0):
+            self._results.popitem(last=False)
+
+    def clear(self):
+        self._results.clear()
+
+    def __len__(self):
+        return len(self._results)
+
+'''
+将graphviz的排版结果保存在磁盘目录中，目录总大小超过上限时淘汰最久未使用的文件。
+多个进程可以共享同一个缓存目录。
+'''
+class DiskLayoutCache():
+    '''
+    cache_dir:str 缓存目录。
+    max_bytes:int 缓存目录中所有文件的总大小上限（字节）。
+    '''
+    def __init__(self, cache_dir, max_bytes):
+        self._cache_dir = cache_dir
+        self._max_bytes = max_bytes
+        os.makedirs(cache_dir, exist_ok=True)
+        self._total_bytes = sum(size for (_, size, _) in self._cache_files_())
+
+    '''
+    key:str 排版键值。
+    fmt:str graphviz的输出格式（'svg'/'plain'，作为缓存文件的后缀名）。
+    返回：str 缓存的排版结果，没有缓存时返回None。
+    '''
+    def get(self, key, fmt='svg'):
+        path = self._cache_path_(key, fmt)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                result = f.read()
+            os.utime(path)  # 更新访问时间，用于LRU淘汰。
+            return result
+        except OSError:
+            return None
+
+    '''
+    key:str 排版键值。
+    result:str graphviz的排版结果。
+    fmt:str graphviz的输出格式（'svg'/'plain'）。
+    '''
+    def put(self, key, result, fmt='svg'):
+        data = result.encode('utf-8')
+        if len(data) > self._max_bytes:
+            return
+        path = self._cache_path_(key, fmt)
+        try:
+            # 覆盖已有的缓存文件时只累加大小的差值。
+            old_size = os.path.getsize(path)
+        except OSError:
+            old_size = 0
+        try:
+            (fd, temp_path) = tempfile.mkstemp(dir=self._cache_dir, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except OSError:
+            return
+        self._total_bytes += len(data) - old_size
+        if self._total_bytes > self._max_bytes:
+            self._evict_()
+
+    '''
+    功能：删除最久未使用的缓存文件，直到总大小不超过上限。
+    '''
+    def _evict_(self):
+        files = sorted(self._cache_files_(), key=lambda f: f[2])
+        self._total_bytes = sum(size for (_, size, _) in files)
+        for (path, size, _) in files:
+            if self._total_bytes <= self._max_bytes:
+                break
+            try:
+                os.remove(path)
+                self._total_bytes -= size
+            except OSError:
+                pass
+
+    '''
+    返回：list((路径, 大小, 修改时间)) 缓存目录中所有的缓存文件。
+    '''
+    def _cache_files_(self):
+        files = list()
+        for entry in os.scandir(self._cache_dir):
+            if entry.name.endswith(_disk_suffixes):
+                try:
+                    stat = entry.stat()
+                    files.append((entry.path, stat.st_size, stat.st_mtime))
+                except OSError:
+                    pass
+        return files
+
+    def _cache_path_(self, key, fmt):
+        return os.path.join(self._cache_dir, '{}.{}'.format(key, fmt))
+
+_layout_cache = LayoutCache()   # 所有SvgGraph对象共享的排版缓存。
+_disk_cache = None              # 可选的磁盘排版缓存。
+_graphviz_version = None        # graphviz的版本号（用于磁盘缓存的键值）。
+_cache_lock = threading.Lock()  # 后台排版线程和主线程共同访问缓存时使用的锁。
+_layout_workers = min(4, os.cpu_count() or 1)   # 常驻graphviz排版进程的最大数量（为0时每次排版启动一个新的进程）。
+_layout_pool = None             # 常驻排版进程池（第一次提交排版任务时创建）。
+
+'''
+source:str graphviz的DOT源码。
+返回：str 由DOT源码计算出的排版键值。
+'''
+def layout_key(source):
+    return hashlib.sha1(source.encode('utf-8')).hexdigest()
+
+'''
+dot:graphviz.Graph/graphviz.Digraph 要排版的拓扑图。
+返回：str graphviz输出的SVG字符串，相同的DOT源码只会调用一次graphviz。
+'''
+def render_svg(dot):
+    return _render_(dot, 'svg')
+
+'''
+dot:graphviz.Graph/graphviz.Digraph 要排版的拓扑图。
+返回：str graphviz输出的plain格式排版结果（节点坐标和边的控制点），相同的DOT源码只会调用一次graphviz。
+'''
+def render_plain(dot):
+    return _render_(dot, 'plain')
+
+'''
+功能：提交一个排版任务，多个拓扑图的排版可以在后台并发执行。
+dot:graphviz.Graph/graphviz.Digraph 要排版的拓扑图。
+返回：concurrent.futures.Future plain格式的排版结果（有缓存或没有启用常驻进程时直接完成）。
+'''
+def submit_plain(dot):
+    pool = _get_layout_pool_()
+    with _cache_lock:
+        result = _layout_cache.get(layout_key('plain\n{}'.format(dot.source)))
+    if pool is None or result is not None:
+        future = concurrent.futures.Future()
+        try:
+            future.set_result(result if result is not None else render_plain(dot))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+    return pool.submit(render_plain, dot)
+
+'''
+dot:graphviz.Graph/graphviz.Digraph 要排版的拓扑图。
+fmt:str graphviz的输出格式（'svg'/'plain'）。
+返回：str graphviz的输出结果。
+'''
+def _render_(dot, fmt):
+    source = dot.source
+    if fmt != 'svg':
+        source = '{}\n{}'.format(fmt, source)
+    key = layout_key(source)
+    with _cache_lock:
+        result = _layout_cache.get(key)
+        disk_cache = _disk_cache
+    if result is None:
+        if disk_cache is not None:
+            disk_key = layout_key('{}\n{}'.format(_get_graphviz_version_(), source))
+            result = disk_cache.get(disk_key, fmt)
+            if result is None:
+                result = _run_graphviz_(dot, fmt)
+                with _cache_lock:
+                    disk_cache.put(disk_key, result, fmt)
+        else:
+            result = _run_graphviz_(dot, fmt)
+        with _cache_lock:
+            _layout_cache.put(key, result)
+    return result
+
+'''
+dot:graphviz.Graph/graphviz.Digraph 要排版的拓扑图。
+fmt:str graphviz的输出格式。
+返回：str graphviz的输出结果。
+'''
+def _run_graphviz_(dot, fmt):
+    if fmt == 'svg':
+        return dot._repr_svg_()
+    pool = _get_layout_pool_()
+    if fmt == 'plain' and pool is not None:
+        result = pool.layout(dot.source, dot.engine)
+        if result is not None:
+            return result
+    return dot.pipe(format=fmt).decode('utf-8')
+
+'''
+返回：LayoutPool 常驻排版进程池，没有启用或当前平台不支持常驻进程时返回None。
+'''
+def _get_layout_pool_():
+    global _layout_pool
+    with _cache_lock:
+        if _layout_pool is None and _layout_workers > 0 and layout_pool.platform_supported():
+            _layout_pool = layout_pool.LayoutPool(_layout_workers)
+        return _layout_pool
+
+'''
+返回：str 当前使用的graphviz版本号。
+'''
+def _get_graphviz_version_():
+    global _graphviz_version
+    if _graphviz_version is None:
+        try:
+            _graphviz_version = '.'.join(str(v) for v in graphviz.version())
+        except Exception:
+            _graphviz_version = 'unknown'
+    return _graphviz_version
+
+'''
+功能：设置排版缓存的最大数量（为0时不缓存）。
+capacity:int 最多缓存的排版结果数量。
+'''
+def setLayoutCacheSize(capacity):
+    with _cache_lock:
+        _layout_cache.resize(capacity)
+
+'''
+功能：设置磁盘排版缓存目录，重复运行同一个notebook时可以直接复用之前的排版结果。
+cache_dir:str 缓存目录，为None时关闭磁盘缓存。
+max_bytes:int 缓存目录的总大小上限（字节）。
+'''
+def setLayoutCacheDir(cache_dir, max_bytes=64*1024*1024):
+    global _disk_cache
+    if cache_dir is None:
+        _disk_cache = None
+    else:
+        _disk_cache = DiskLayoutCache(cache_dir, max_bytes)
+
+'''
+功能：设置常驻graphviz排版进程的最大数量，多个拓扑图的排版可以并发执行。
+count:int 常驻进程的最大数量，为0时关闭常驻进程（每次排版启动一个新的graphviz进程）。
+'''
+def setLayoutWorkers(count):
+    global _layout_pool, _layout_workers
+    with _cache_lock:
+        (pool, _layout_pool) = (_layout_pool, None)
+        _layout_workers = max(count, 0)
+    if pool is not None:
+        pool.close()
+
+'''
+功能：程序退出时关闭常驻排版进程池（模块中只注册一次）。
+'''
+def _close_layout_pool_():
+    global _layout_pool
+    with _cache_lock:
+        (pool, _layout_pool) = (_layout_pool, None)
+    if pool is not None:
+        pool.close()
+
+atexit.register(_close_layout_pool_)
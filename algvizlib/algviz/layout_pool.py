@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+
+'''
+@author:zjluestc@outlook.com
+@license:GPLv3
+'''
+
+import concurrent.futures
+import os
+import queue
+import select
+import subprocess
+import threading
+import time
+
+_probe_timeout = 5      # 启动常驻进程时等待graphviz响应的最长时间（秒）。
+_layout_timeout = 60    # 等待一个图的排版结果的最长时间（秒），超时的进程会被结束。
+_max_failures = 3       # 常驻进程连续失败的次数达到该值时不再使用常驻进程。
+_unsupported = False    # 常驻进程是否无法使用（启动或响应探测失败后，所有进程池都不再尝试启动常驻进程）。
+
+'''
+返回：bool 当前平台是否可以使用常驻进程（Windows上不能对管道使用select等待输出）。
+'''
+def platform_supported():
+    return os.name != 'nt'
+
+'''
+常驻的graphviz排版进程：通过管道连续输入多个DOT图，按顺序读取每个图的plain格式排版结果（以stop行结束）。
+'''
+class LayoutWorker():
+    '''
+    engine:str graphviz的排版引擎（例如dot）。
+    '''
+    def __init__(self, engine='dot'):
+        global _unsupported
+        try:
+            self._proc = subprocess.Popen([engine, '-Tplain'], stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL)
+        except (OSError, ValueError):
+            _unsupported = True
+            raise
+        self._buffer = b''      # 已读取但还不属于任何一个完整结果的输出。
+        # 用一个空图确认该版本的graphviz可以逐个图输出结果（输出不及时刷新的graphviz会等到超时），
+        # 探测失败后记录下来，之后的排版不再等待常驻进程。
+        try:
+            self._proc.stdin.write(b'digraph {}\n')
+            self._proc.stdin.flush()
+            self._read_result_(_probe_timeout)
+        except (OSError, ValueError):
+            _unsupported = True
+            self.close()
+            raise
+
+    '''
+    source:str DOT源码。
+    返回：str plain格式的排版结果。
+    '''
+    def layout(self, source):
+        if not source.endswith('\n'):
+            source += '\n'
+        self._proc.stdin.write(source.encode('utf-8'))
+        self._proc.stdin.flush()
+        return self._read_result_(_layout_timeout)
+
+    def close(self):
+        try:
+            self._proc.stdin.close()
+            self._proc.wait(timeout=1)
+        except Exception:
+            self._proc.kill()
+            self._proc.wait()
+
+    '''
+    功能：读取一个图的排版结果（到stop行为止），超时后结束进程。
+    timeout:float 最长等待时间（秒）。
+    返回：str 排版结果。
+    '''
+    def _read_result_(self, timeout):
+        deadline = time.monotonic() + timeout
+        fd = self._proc.stdout.fileno()
+        while True:
+            if self._buffer.startswith(b'stop\n'):
+                end = len(b'stop\n')
+            else:
+                end = self._buffer.find(b'\nstop\n')
+                end = -1 if end == -1 else end + len(b'\nstop\n')
+            if end != -1:
+                (res, self._buffer) = (self._buffer[:end], self._buffer[end:])
+                return res.decode('utf-8')
+            remain = deadline - time.monotonic()
+            (ready, _, _) = select.select([fd], [], [], max(remain, 0))
+            if len(ready) == 0:
+                self._proc.kill()
+                self._proc.wait()
+                raise OSError('graphviz worker timed out')
+            data = os.read(fd, 65536)
+            if len(data) == 0:
+                raise OSError('graphviz worker exited')
+            self._buffer += data
+
+'''
+graphviz排版服务：维护若干个常驻的排版进程，并在后台线程中并发执行排版任务。
+常驻进程无法使用时（例如graphviz不支持或没有安装），由调用方退回到每次启动一个graphviz进程的方式。
+进程异常退出或排版超时后会重新启动，连续失败多次后才不再使用常驻进程；启动时的探测失败则不再重试。
+'''
+class LayoutPool():
+    '''
+    size:int 最多同时运行的排版进程数量。
+    '''
+    def __init__(self, size):
+        self._size = size
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=size)
+        self._idle = queue.LifoQueue()  # 空闲的常驻排版进程。
+        self._failures = 0              # 常驻进程连续失败的次数。
+        self._lock = threading.Lock()
+
+    '''
+    fn:callable 在后台线程中执行的任务。
+    args:... 任务的参数。
+    返回：concurrent.futures.Future 任务的结果。
+    '''
+    def submit(self, fn, *args):
+        return self._executor.submit(fn, *args)
+
+    '''
+    功能：使用一个空闲的常驻进程完成排版（可以在任意线程中调用，调用线程会等待结果）。
+    source:str DOT源码。
+    engine:str graphviz的排版引擎。
+    返回：str plain格式的排版结果，常驻进程不可用时返回None。
+    '''
+    def layout(self, source, engine='dot'):
+        worker = self._acquire_(engine)
+        if worker is None:
+            return None
+        try:
+            result = worker.layout(source)
+        except (OSError, ValueError):
+            # 进程异常退出或超时（例如DOT源码有错误），丢弃该进程，下一次排版时重新启动。
+            worker.close()
+            self._record_failure_(True)
+            return None
+        self._record_failure_(False)
+        self._idle.put((engine, worker))
+        return result
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        while not self._idle.empty():
+            (_, worker) = self._idle.get_nowait()
+            worker.close()
+
+    '''
+    engine:str graphviz的排版引擎。
+    返回：LayoutWorker 空闲的常驻进程（没有时启动一个新的进程），常驻进程不可用时返回None。
+    '''
+    def _acquire_(self, engine):
+        with self._lock:
+            if _unsupported or self._failures >= _max_failures:
+                return None
+        try:
+            (worker_engine, worker) = self._idle.get_nowait()
+            if worker_engine == engine:
+                return worker
+            worker.close()
+        except queue.Empty:
+            pass
+        try:
+            return LayoutWorker(engine)
+        except (OSError, ValueError):
+            self._record_failure_(True)
+            return None
+
+    '''
+    failed:bool 常驻进程是否失败（成功时清零连续失败的次数）。
+    '''
+    def _record_failure_(self, failed):
+        with self._lock:
+            self._failures = self._failures + 1 if failed else 0
@@ -15,6 +15,7 @@ class Logger():
     def __init__(self, buffer_lines):
         self._buffer_lines = buffer_lines
         self._logs = list()
+        self._dirty = True      # 上一次显示后是否写入了新的内容。
     
     '''
     功能：向日志输出器中写入输出数据。
@@ -26,14 +27,17 @@ class Logger():
             if len(self._logs) >= self._buffer_lines:
                 self._logs.pop(0)
             self._logs.append(line)
+        self._dirty = True
     
     '''
     功能：情况缓存的数据。
     '''
     def clear(self):
         self._logs.clear()
+        self._dirty = True
     
     def __repr__(self):
+        self._dirty = False
         res = str()
         for s in self._logs:
             res += s + '\n'
@@ -5,10 +5,15 @@
 @license:GPLv3
 '''
 
+import concurrent.futures
 import graphviz
 import xml.dom.minidom as xmldom
 
 import utility as util
+import layout_cache
+import tree_layout
+import graph_layout
+import incremental_layout
 
 class SvgGraph(): 
     '''
@@ -16,11 +21,14 @@ class SvgGraph():
     directed:bool 表示拓扑图是否为有向图。
     delay:float 动画延时时长。
     horizontal:bool 是否对拓扑图进行横向排版（用于链表类型的图的显示）。
+    incremental:bool 是否在上一帧排版结果的基础上增量排版（新增的边显示为直线，节点位置与graphviz的排版结果不同）。
     '''
-    def __init__(self, data, directed, delay, horizontal=False):
+    def __init__(self, data, directed, delay, horizontal=False, incremental=False):
         self._directed = directed       # 拓扑图是否为有向图。
         self._delay = delay             # 每帧动画的延时时长。
+        self._begin = 0                 # 动画开始时间（用于连续播放排队的多帧动画）。
         self._horizontal = horizontal   # 拓扑图是否横向排版。
+        self._incremental = incremental # 是否使用增量排版。
         self._node_seq = list()         # 所有节点按照一定的拓扑顺序排列。
         self._add_nodes = list()        # 记录每帧间隔中外部添加的节点。
         self._remove_nodes = list()     # 记录每帧间隔中外部删除的节点。
@@ -32,13 +40,20 @@ class SvgGraph():
         self._edge_appear = set()       # 记录下一帧动画中出现的边集合。
         self._edge_disappear = set()    # 记录下一帧动画中消失的边集合。
         self._node_move = set()         # 记录在动画效果中移动的节点集合。
-        self._frame_trace_old = list()  # 缓存上一帧需要清除的节点/边相关信息（节点/边索引：（轨迹颜色值））。
-        self._frame_trace = list()      # 记录下一帧待刷新的节点/边相关信息(节点/边索引：（轨迹颜色值，是否持久化））。
+        self._frame_trace_old = dict()  # 缓存上一帧需要清除的节点/边相关信息（轨迹颜色值：节点/边集合）。
+        self._frame_trace = dict()      # 记录下一帧待刷新的节点/边相关信息（(轨迹颜色值，是否持久化)：节点/边集合）。
+        self._color_marks = dict()      # 标记颜色到当前带有该颜色的节点/边集合的映射关系。
         self._svg = None                # 将要显示的拓扑图的svg对象。
+        self._svg_handles = dict()      # 当前svg对象中元素id（graph0/graph1/node{n}/edge{n}）到<g>元素的映射关系。
+        self._layout = None             # 当前svg对象对应的排版结果（节点位置和边的路径）。
+        self._layout_submitted = False  # 是否已经为下一帧检查过拓扑结构（并在需要时提交了排版任务）。
+        self._layout_job = None         # 已提交还没有显示的排版任务，拓扑结构没有变化时为None。
         self._node_idmap = None         # 实际节点和graphviz中对应节点的id值。
         self._edge_idmap = None         # 实际节点对和graphviz中对应边的id值。
         self._add_history = set()       # 记录所有被添加进来的节点。
-        (self._svg, self._node_idmap, self._edge_idmap) = self._create_svg_()
+        self._dirty = True              # 上一次显示后是否有需要刷新的变化。
+        (self._svg, self._layout, self._node_idmap, self._edge_idmap) = self._create_svg_(self._start_layout_())
+        self._svg_handles = self._index_svg_(self._svg)
         if data is not None:
             if type(data)==list:
                 for node in data:
@@ -52,6 +67,7 @@ class SvgGraph():
     def addNode(self, node):
         if node in self._add_history:
             return
+        self._dirty = True
         node_stack = [node]
         while len(node_stack) > 0:
             cur_node = node_stack.pop()
@@ -75,6 +91,7 @@ class SvgGraph():
                 continue
             cur_node._remove_graph_(self)
             self._add_history.remove(cur_node)
+            self._dirty = True
             if cur_node not in self._remove_nodes:
                 self._remove_nodes.append(cur_node)
             if recursive:
@@ -91,7 +108,9 @@ class SvgGraph():
             if node not in self._node_tcs.keys():
                 self._node_tcs[node] = util.TraceColorStack()
             self._node_tcs[node].add(color)
-            self._frame_trace.append((node, color, hold))
+            self._color_marks.setdefault(color, set()).add(node)
+            self._frame_trace.setdefault((color, hold), set()).add(node)
+            self._dirty = True
     
     '''
     color:(R, G, B) 标记颜色。
@@ -104,22 +123,26 @@ class SvgGraph():
             if edge_key not in self._edge_tcs.keys():
                 self._edge_tcs[edge_key] = util.TraceColorStack(bgcolor=(123, 123, 123))
             self._edge_tcs[edge_key].add(color)
-            self._frame_trace.append((edge_key, color, hold))
+            self._color_marks.setdefault(color, set()).add(edge_key)
+            self._frame_trace.setdefault((color, hold), set()).add(edge_key)
+            self._dirty = True
     
     '''
     color:(R,G,B) 将要被删除的标记颜色。
     '''
     def removeMark(self, color):
-        for k in self._node_seq:
-            if self._node_tcs[k].remove(color):
-                node_id = 'node{}'.format(self._node_idmap.toConsecutiveId(k))
-                node = util.find_tag_by_id(self._svg, 'g', node_id)
-                self._update_node_color_(node, self._node_tcs[k].color())
-        for k in self._edge_label.keys():
-            if self._edge_tcs[k].remove(color):
-                edge_id = 'edge{}'.format(self._edge_idmap.toConsecutiveId(k))
-                edge = util.find_tag_by_id(self._svg, 'g', edge_id)
-                self._update_edge_color_(edge, self._edge_tcs[k].color())
+        # 只访问带有该颜色标记的节点和边。
+        for k in self._color_marks.pop(color, set()):
+            if type(k) == tuple and k in self._edge_tcs.keys():
+                if self._edge_tcs[k].remove(color) and k in self._edge_idmap._attr2id.keys():
+                    edge = self._svg_handles.get('edge{}'.format(self._edge_idmap.toConsecutiveId(k)))
+                    self._update_edge_color_(edge, self._edge_tcs[k].color())
+                    self._dirty = True
+            elif k in self._node_tcs.keys():
+                if self._node_tcs[k].remove(color) and k in self._node_idmap._attr2id.keys():
+                    node = self._svg_handles.get('node{}'.format(self._node_idmap.toConsecutiveId(k)))
+                    self._update_node_color_(node, self._node_tcs[k].color())
+                    self._dirty = True
     
     '''
     功能：更新拓扑图中节点的标签值。
@@ -127,10 +150,10 @@ class SvgGraph():
     label:... 新的标签内容。
     '''
     def _updateNodeLabel(self, node, label):
-        node_id = 'node{}'.format(self._node_idmap.toConsecutiveId(node))
-        svg_node = util.find_tag_by_id(self._svg, 'g', node_id)
+        svg_node = self._svg_handles.get('node{}'.format(self._node_idmap.toConsecutiveId(node)))
         if svg_node is None or label is None:
             return
+        self._dirty = True
         ellipse = svg_node.getElementsByTagName('ellipse')[0]
         cx = float(ellipse.getAttribute('cx'))
         cy = float(ellipse.getAttribute('cy'))
@@ -158,35 +181,55 @@ class SvgGraph():
     '''
     def _updateEdgeLabel(self, node1, node2, label):
         edge_key = self._make_edge_tuple_(node1, node2)
-        edge_id = 'edge{}'.format(self._edge_idmap.toConsecutiveId(edge_key))
-        svg_node = util.find_tag_by_id(self._svg, 'g', edge_id)
+        svg_node = self._svg_handles.get('edge{}'.format(self._edge_idmap.toConsecutiveId(edge_key)))
         if svg_node is None or label is None:
             return
+        self._dirty = True
         text = svg_node.getElementsByTagName('text')[0]
         for t in text.childNodes:
             text.removeChild(t)
         tt = self._svg.createTextNode('{}'.format(label))
         text.appendChild(tt)
     
+    '''
+    功能：检查拓扑结构的变化，需要重新排版时提交排版任务，显示时再等待排版结果。
+    Visualizer在刷新前为所有拓扑图提交排版任务，多个拓扑图的排版可以并发执行。
+    '''
+    def _submit_layout_(self):
+        if self._layout_submitted:
+            return
+        self._layout_submitted = True
+        if self._traverse_graph_():
+            self._layout_job = self._start_layout_()
+    
     '''
     返回:str 拓扑图SVG显示字符串。
     '''
     def _repr_svg_(self):
+        self._submit_layout_()
+        (job, self._layout_job) = (self._layout_job, None)
+        self._layout_submitted = False
+        if job is None:
+            # 拓扑结构没有变化时复用上一帧的排版结果，只需更新颜色（标签已在修改时更新）。
+            self._update_trace_color_()
+            self._dirty = len(self._frame_trace_old) > 0
+            return self._svg.toxml()
         # 对拓扑图进行重新排版并添加动画效果。
-        self._traverse_graph_()
-        (new_svg, node_idmap, edge_idmap) = self._create_svg_()
-        self._update_svg_size_(new_svg)
-        self._update_svg_nodes_(new_svg, node_idmap)
-        self._update_svg_edges_(new_svg, edge_idmap)
+        (new_svg, new_layout, node_idmap, edge_idmap) = self._create_svg_(job)
+        new_handles = self._index_svg_(new_svg)
+        self._update_svg_size_(new_svg, new_handles)
+        self._update_svg_nodes_(new_layout, new_handles, node_idmap)
+        self._update_svg_edges_(new_handles, edge_idmap)
         self._update_trace_color_()
         res = self._svg.toxml()
         # 更新SVG内容，为下一帧做准备。
         self._svg, self._node_idmap, self._edge_idmap = new_svg, node_idmap, edge_idmap
-        new_nodes = self._get_node_pos_(self._svg)
+        (self._svg_handles, self._layout) = (new_handles, new_layout)
+        new_nodes = self._get_node_pos_(self._layout, self._svg_handles)
         for node_id in new_nodes.keys():
             node = self._node_idmap.toAttributeId(node_id)
             self._update_node_color_(new_nodes[node_id][0], self._node_tcs[node].color())
-        new_edges = self._get_svg_edges_(self._svg)
+        new_edges = self._get_svg_edges_(self._svg_handles)
         for edge_id in new_edges.keys():
             edge = self._edge_idmap.toAttributeId(edge_id)
             self._update_edge_color_(new_edges[edge_id], self._edge_tcs[edge].color())
@@ -195,16 +238,21 @@ class SvgGraph():
             self._node_tcs.pop(node)
         for edge in self._edge_disappear:
             self._edge_tcs.pop(edge)
+        for marks in self._color_marks.values():
+            marks -= self._node_disappear
+            marks -= self._edge_disappear
         self._node_appear.clear()
         self._node_disappear.clear()
         self._edge_appear.clear()
         self._edge_disappear.clear()
         self._node_move.clear()
+        # 还有需要在下一帧清除的临时标记时，下一帧仍需刷新。
+        self._dirty = len(self._frame_trace_old) > 0
         return res
     
     '''
     功能：遍历拓扑图中的每个节点，更新相关的数据结构。
-    返回：list()图节点的拓扑排序列表，dict()新的边标签。
+    返回：bool 拓扑结构（节点序列和边集合）是否发生了变化。
     '''
     def _traverse_graph_(self):
         # 遍历图中节点，记录新的拓扑图结构。
@@ -224,6 +272,13 @@ class SvgGraph():
                     temp_edge = self._make_edge_tuple_(cur_node, neigh[0])
                     new_edge_label[temp_edge] = neigh[1]
                     node_stack.append(neigh[0])
+        # 判断拓扑结构是否变化（边上有无标签也会影响排版）。
+        changed = new_node_seq != self._node_seq or new_edge_label.keys() != self._edge_label.keys()
+        if not changed:
+            for edge in new_edge_label.keys():
+                if (new_edge_label[edge] is None) != (self._edge_label[edge] is None):
+                    changed = True
+                    break
         # 更新新增/消失的边和节点。
         old_node_set = set(self._node_seq)
         new_node_set = set(new_node_seq)
@@ -243,6 +298,7 @@ class SvgGraph():
         self._edge_label = new_edge_label
         self._add_nodes.clear()
         self._remove_nodes.clear()
+        return changed
     
     '''
     node:xmldom.Node 要更新的拓扑图节点的SVG对象。
@@ -273,38 +329,29 @@ class SvgGraph():
     功能：更新该帧中SVG的轨迹颜色变化。
     '''
     def _update_trace_color_(self):
-        for k, color in self._frame_trace_old:
-            if type(k) == tuple and k in self._edge_tcs.keys():
-                if (k, color, False) not in self._frame_trace and (k, color, True) not in self._frame_trace:
+        (expired, touched) = util.merge_frame_trace(self._frame_trace, self._frame_trace_old)
+        for (color, keys) in expired.items():
+            for k in keys:
+                if type(k) == tuple and k in self._edge_tcs.keys():
                     self._edge_tcs[k].remove(color)
-                edge_id = 'edge{}'.format(self._edge_idmap.toConsecutiveId(k))
-                edge = util.find_tag_by_id(self._svg, 'g', edge_id)
-                self._update_edge_color_(edge, self._edge_tcs[k].color())
-            elif k in self._node_tcs.keys():
-                if (k, color, False) not in self._frame_trace and (k, color, True) not in self._frame_trace:
+                elif k in self._node_tcs.keys():
                     self._node_tcs[k].remove(color)
-                node_id = 'node{}'.format(self._node_idmap.toConsecutiveId(k))
-                node = util.find_tag_by_id(self._svg, 'g', node_id)
-                self._update_node_color_(node, self._node_tcs[k].color())
-        self._frame_trace_old.clear()
-        for k, color, hold in self._frame_trace:
-            if type(k) == tuple:
-                edge_id = 'edge{}'.format(self._edge_idmap.toConsecutiveId(k))
-                edge = util.find_tag_by_id(self._svg, 'g', edge_id)
+            if color in self._color_marks:
+                self._color_marks[color] -= keys
+        for k in touched:
+            if type(k) == tuple and k in self._edge_tcs.keys():
+                edge = self._svg_handles.get('edge{}'.format(self._edge_idmap.toConsecutiveId(k)))
                 self._update_edge_color_(edge, self._edge_tcs[k].color())
-            else:
-                node_id = 'node{}'.format(self._node_idmap.toConsecutiveId(k))
-                node = util.find_tag_by_id(self._svg, 'g', node_id)
+            elif k in self._node_tcs.keys():
+                node = self._svg_handles.get('node{}'.format(self._node_idmap.toConsecutiveId(k)))
                 self._update_node_color_(node, self._node_tcs[k].color())
-            if not hold:
-                self._frame_trace_old.append((k, color))
-        self._frame_trace.clear()
     
     '''
     功能：调整self._svg的视图尺寸，以保证所有元素都能被观察到。
     new_svg:xmldom.Document 最新的SVG对象。
+    new_handles:dict 最新的SVG对象中元素id到<g>元素的映射关系。
     '''
-    def _update_svg_size_(self, new_svg):
+    def _update_svg_size_(self, new_svg, new_handles):
         old_svg_node = self._svg.getElementsByTagName('svg')[0]
         new_svg_node = new_svg.getElementsByTagName('svg')[0]
         old_svg_width = int(old_svg_node.getAttribute('width')[0:-2])
@@ -316,27 +363,27 @@ class SvgGraph():
         old_svg_node.setAttribute('width', '{}pt'.format(width))
         old_svg_node.setAttribute('height', '{}pt'.format(height))
         old_svg_node.setAttribute('viewBox', '0.00 0.00 {:.2f} {:.2f}'.format(width, height))
-        graph = util.find_tag_by_id(new_svg, 'g', 'graph0')
-        clone_graph = graph.cloneNode(deep=False)
+        clone_graph = new_handles['graph0'].cloneNode(deep=False)
         clone_graph.setAttribute('id', 'graph1')
         old_svg_node.appendChild(clone_graph)
+        self._svg_handles['graph1'] = clone_graph
     
     '''
     功能：向SVG中添加所有与节点有关的动画。
     edge_idmap:ConsecutiveIdMap 边在内存中的ID和在SVG中的ID的双向映射关系。
-    new_svg:xmldom.Document 最新的SVG对象。
+    new_handles:dict 最新的SVG对象中元素id到<g>元素的映射关系。
     '''
-    def _update_svg_edges_(self, new_svg, edge_idmap):
-        old_edges = self._get_svg_edges_(self._svg)
-        new_edges = self._get_svg_edges_(new_svg)
+    def _update_svg_edges_(self, new_handles, edge_idmap):
+        old_edges = self._get_svg_edges_(self._svg_handles)
+        new_edges = self._get_svg_edges_(new_handles)
         for old_edge_id in old_edges.keys():
             (node1, node2) = self._edge_idmap.toAttributeId(old_edge_id)  # 边的（起点，终点）在内存中的ID值。
             # 添加边的消失动画效果。
             if (node1, node2) in self._edge_disappear or node1 in self._node_move or node2 in self._node_move:
                 g = old_edges[old_edge_id]
                 animate = self._svg.createElement('animate')
-                util.add_animate_appear_into_node(g, animate, (0, self._delay), False)
-        graph = util.find_tag_by_id(self._svg, 'g', 'graph1')
+                util.add_animate_appear_into_node(g, animate, (self._begin, self._begin+self._delay), False)
+        graph = self._svg_handles['graph1']
         for new_edge_id in new_edges.keys():
             (node1, node2) = edge_idmap.toAttributeId(new_edge_id)
             if (node1, node2) in self._edge_appear or node1 in self._node_move or node2 in self._node_move:
@@ -344,17 +391,19 @@ class SvgGraph():
                 clone_edge = new_edges[new_edge_id].cloneNode(deep=True)
                 clone_edge.setAttribute('id', 'edge{}'.format(old_edge_id))
                 graph.appendChild(clone_edge)
+                self._svg_handles.setdefault('edge{}'.format(old_edge_id), clone_edge)
                 animate = self._svg.createElement('animate')
-                util.add_animate_appear_into_node(clone_edge, animate, (0, self._delay), True)
+                util.add_animate_appear_into_node(clone_edge, animate, (self._begin, self._begin+self._delay), True)
     
     '''
     功能：向SVG中添加所有与边有关的动画。
     node_idmap:ConsecutiveIdMap 节点在内存中的ID和在SVG中的ID的双向映射关系。
-    new_svg:xmldom.Document 最新的SVG对象。
+    new_layout:GraphLayout 最新的排版结果。
+    new_handles:dict 最新的SVG对象中元素id到<g>元素的映射关系。
     '''
-    def _update_svg_nodes_(self, new_svg, node_idmap):
-        old_pos = self._get_node_pos_(self._svg)
-        new_pos = self._get_node_pos_(new_svg)
+    def _update_svg_nodes_(self, new_layout, new_handles, node_idmap):
+        old_pos = self._get_node_pos_(self._layout, self._svg_handles)
+        new_pos = self._get_node_pos_(new_layout, new_handles)
         for old_node_id in old_pos.keys():
             old_node = self._node_idmap.toAttributeId(old_node_id)
             if old_node in node_idmap._attr2id.keys():
@@ -366,15 +415,15 @@ class SvgGraph():
                     g = old_pos[old_node_id][0]
                     animate = self._svg.createElement('animateMotion')
                     move = (delt_x, delt_y)
-                    time = (0, self._delay)
+                    time = (self._begin, self._begin+self._delay)
                     util.add_animate_move_into_node(g, animate, move, time, False)
                     self._node_move.add(old_node)
             elif old_node in self._node_disappear:
                 # 添加图节点的消失动画效果。
                 g = old_pos[old_node_id][0]
                 animate = self._svg.createElement('animate')
-                util.add_animate_appear_into_node(g, animate, (0, self._delay), False)
-        graph = util.find_tag_by_id(self._svg, 'g', 'graph1')
+                util.add_animate_appear_into_node(g, animate, (self._begin, self._begin+self._delay), False)
+        graph = self._svg_handles['graph1']
         for old_node in self._node_appear:
             # 添加图节点的出现动画效果。
             new_node_id = node_idmap.toConsecutiveId(old_node)
@@ -382,47 +431,46 @@ class SvgGraph():
             clone_node = new_pos[new_node_id][0].cloneNode(deep=True)
             clone_node.setAttribute('id', 'node{}'.format(old_node_id))
             graph.appendChild(clone_node)
+            self._svg_handles.setdefault('node{}'.format(old_node_id), clone_node)
             animate = self._svg.createElement('animate')
-            util.add_animate_appear_into_node(clone_node, animate, (0, self._delay), True)
+            util.add_animate_appear_into_node(clone_node, animate, (self._begin, self._begin+self._delay), True)
     
     '''
-    功能：获取svg中拓扑图节点的位置坐标（绝对坐标）。
-    svg:xmldom.Document 显示的SVG对象。
-    '''
-    def _get_node_pos_(self, svg):
-        graph = util.find_tag_by_id(svg, 'g', 'graph0')
-        transform = graph.getAttribute('transform')
-        translate_index = transform.find('translate')
-        delt_x, delt_y = 0, 0
-        if translate_index != -1:
-            st = transform.find('(', translate_index) + 1
-            ed = transform.find(')', translate_index)
-            translate = transform[st:ed].split(' ')
-            delt_x, delt_y = float(translate[0]), float(translate[1])
+    功能：获取拓扑图节点的位置坐标（绝对坐标，直接使用排版结果，不需要解析SVG）。
+    layout:GraphLayout 排版结果。
+    handles:dict SVG对象中元素id到<g>元素的映射关系。
+    返回：dict 节点id到(<g>元素, x, y)的映射关系。
+    '''
+    def _get_node_pos_(self, layout, handles):
         positions = dict()
-        nodes = svg.getElementsByTagName('g')
-        for node in nodes:
-            if node.getAttribute('class') == 'node':
-                node_id = int(node.getAttribute('id')[4:])
-                ellipse = node.getElementsByTagName('ellipse')[0]
-                cx = float(ellipse.getAttribute('cx')) + delt_x
-                cy = float(ellipse.getAttribute('cy')) + delt_y
-                positions[node_id] = (node, cx, cy)
+        for node_id in layout.nodes.keys():
+            (x, y) = layout.node_pos(node_id)
+            positions[node_id] = (handles.get('node{}'.format(node_id)), x, y)
         return positions
     
     '''
     功能：获取svg中拓扑图的所有边。
-    svg:xmldom.Document 显示的SVG对象。
+    handles:dict SVG对象中元素id到<g>元素的映射关系。
     '''
-    def _get_svg_edges_(self, svg):
+    def _get_svg_edges_(self, handles):
         edges = dict()
-        nodes = svg.getElementsByTagName('g')
-        for node in nodes:
+        for node in handles.values():
             if node.getAttribute('class') == 'edge':
                 edge_id = int(node.getAttribute('id')[4:])
                 edges[edge_id] = node
         return edges
     
+    '''
+    功能：建立SVG中所有<g>元素的索引，id重复时保留文档中的第一个元素。
+    svg:xmldom.Document 排版后的SVG对象。
+    返回:dict 元素id到<g>元素的映射关系。
+    '''
+    def _index_svg_(self, svg):
+        handles = dict()
+        for g in svg.getElementsByTagName('g'):
+            handles.setdefault(g.getAttribute('id'), g)
+        return handles
+    
     '''
     功能：将两个节点打包成一条边。
     node1/node2:... 边上的两个端点。
@@ -437,13 +485,46 @@ class SvgGraph():
                 return (node2, node1)
     
     '''
-    功能：更新拓扑图中各个节点的位置。
-    返回:xmldom.Document 经过graphviz排版后拓扑图。
+    功能：开始对拓扑图排版，树和链表使用内置的排版引擎，其它拓扑图提交graphviz排版任务（plain格式输出）；
+    启用增量排版时在上一帧排版结果的基础上增量排版，没有上一帧的排版结果或拓扑结构变化过大时仍由graphviz排版。
+    返回:(GraphLayout/Future, ConsecutiveIdMap, ConsecutiveIdMap) 排版结果（或graphviz排版任务）和节点/边的id映射关系。
     '''
-    def _create_svg_(self):
-        dot = None
+    def _start_layout_(self):
         node_idmap = util.ConsecutiveIdMap(1)
         edge_idmap = util.ConsecutiveIdMap(1)
+        for node in self._node_seq:
+            node_idmap.toConsecutiveId(node)
+        for edge in self._edge_label.keys():
+            edge_idmap.toConsecutiveId(edge)
+        if tree_layout.supported(self._node_seq):
+            layout = tree_layout.layout(self._node_seq, node_idmap, self._horizontal)
+        else:
+            layout = None
+            if self._incremental and self._layout is not None:
+                layout = incremental_layout.relayout(self._layout, self._node_idmap, self._edge_idmap._attr2id.keys(),
+                    self._node_seq, self._edge_label, node_idmap, self._directed, self._horizontal)
+            if layout is None:
+                layout = layout_cache.submit_plain(self._create_dot_(node_idmap))
+        return (layout, node_idmap, edge_idmap)
+    
+    '''
+    功能：等待排版结果，并由排版结果生成SVG。
+    job:tuple _start_layout_返回的排版任务。
+    返回:(xmldom.Document, GraphLayout, ConsecutiveIdMap, ConsecutiveIdMap) 排版后的拓扑图、排版结果和节点/边的id映射关系。
+    '''
+    def _create_svg_(self, job):
+        (layout, node_idmap, edge_idmap) = job
+        if isinstance(layout, concurrent.futures.Future):
+            layout = graph_layout.parse_plain(layout.result())
+        svg_str = graph_layout.layout_svg(layout, self._node_seq, self._edge_label, node_idmap, self._directed)
+        return (xmldom.parseString(svg_str), layout, node_idmap, edge_idmap)
+
+    '''
+    node_idmap:ConsecutiveIdMap 节点和graphviz中节点id之间的映射关系。
+    返回:graphviz.Graph/graphviz.Digraph 用于graphviz排版的拓扑图。
+    '''
+    def _create_dot_(self, node_idmap):
+        dot = None
         if self._directed:
             dot = graphviz.Digraph(format='svg')
         else:
@@ -467,5 +548,4 @@ class SvgGraph():
                 dot.edge('{}'.format(node1_id), '{}'.format(node2_id))
             else:
                 dot.edge('{}'.format(node1_id), '{}'.format(node2_id), label='{}'.format(label), fontcolor='#C0C0C0', fontsize='12')
-            edge_idmap.toConsecutiveId((node1, node2))
-        return (xmldom.parseString(dot._repr_svg_()), node_idmap, edge_idmap)
+        return dot
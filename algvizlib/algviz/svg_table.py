@@ -5,34 +5,46 @@
 @license:GPLv3
 '''
 
-import xml.dom.minidom as xmldom
+import copy
 
 import utility as util
 
+_RECT = 1   # 矩形元素（可带文本）。
+_TEXT = 2   # 纯文本元素。
+
 class SvgTable():
     '''
     width:SVG的宽度；heigt:SVG的高度。
-    功能：创建一个SVG的XML结构对象。
+    功能：创建一个SVG对象，所有元素按id以紧凑的平行数组形式保存，显示时一次性拼接为XML字符串。
     '''
     def __init__(self, width, height):
-        self._dom = xmldom.Document()
         self._cur_id = 0
-        self._svg = self._dom.createElement('svg')
-        self._svg.setAttribute('width', '{:.0f}pt'.format(width))
-        self._svg.setAttribute('height', '{:.0f}pt'.format(height))
-        self._svg.setAttribute('viewBox', '0.00 0.00 {:.2f} {:.2f}'.format(width, height))
-        self._svg.setAttribute('xmlns', 'http://www.w3.org/2000/svg')
-        self._dom.appendChild(self._svg)
+        self._width = width
+        self._height = height
+        self._kind = list()         # 元素类型（_RECT/_TEXT），已删除的元素为None。
+        self._x = list()            # 矩形左下角x坐标/文本x坐标。
+        self._y = list()            # 矩形左下角y坐标/文本y坐标。
+        self._w = list()            # 矩形宽度。
+        self._h = list()            # 矩形高度。
+        self._angle = list()        # 矩形是否为圆角。
+        self._fill = list()         # 矩形填充颜色/文本颜色。
+        self._stroke = list()       # 矩形边框颜色。
+        self._text = list()         # 文本内容，矩形中没有文本时为None。
+        self._tx = list()           # 矩形中文本的x坐标。
+        self._ty = list()           # 矩形中文本的y坐标。
+        self._tfs = list()          # 文本字体大小。
+        self._style = list()        # <g>元素的style属性，未设置时为None。
+        self._animates = dict()     # 元素id到该元素上动画(是否为出现/消失动画, XML字符串)列表的映射关系。
+        self._text_pos = dict()     # 添加动画之后才添加文本的矩形id到文本之前的动画数量的映射关系（文本输出在这些动画之后）。
 
     '''
     width:SVG的宽度；heigt:SVG的高度。
     功能：更新svg的宽度和高度。
     '''
     def update_svg_size(self, width, height):
-        self._svg.setAttribute('width', '{:.0f}pt'.format(width))
-        self._svg.setAttribute('height', '{:.0f}pt'.format(height))
-        self._svg.setAttribute('viewBox', '0.00 0.00 {:.2f} {:.2f}'.format(width, height))
-        
+        self._width = width
+        self._height = height
+
     '''
     rect:(x, y, w, h) 矩形左下角坐标和矩形尺寸。
     text:str 矩形内部文本字符串。
@@ -42,36 +54,19 @@ class SvgTable():
     返回:int 该矩形元素的id值。
     '''
     def add_rect_element(self, rect, text=None, fill=(255,255,255), stroke=(123,123,123), angle=True):
-        gid = str(self._cur_id)
-        self._cur_id += 1
-        g = self._dom.createElement('g')
-        g.setAttribute('id', gid)
-        self._svg.appendChild(g)
-        r = self._dom.createElement('rect')
-        r.setAttribute('x', '{:.2f}'.format(rect[0]))
-        r.setAttribute('y', '{:.2f}'.format(rect[1]))
-        r.setAttribute('width', '{:.2f}'.format(rect[2]))
-        r.setAttribute('height', '{:.2f}'.format(rect[3]))
-        if angle is True:
-            r.setAttribute('rx', '{:.2f}'.format(min(rect[2], rect[3])*0.1))
-            r.setAttribute('ry', '{:.2f}'.format(min(rect[2], rect[3])*0.1))
-        r.setAttribute('fill', util.rgbcolor2str(fill))
-        r.setAttribute('stroke', util.rgbcolor2str(stroke))
-        g.appendChild(r)
+        gid = self._new_element_(_RECT)
+        self._x[gid], self._y[gid], self._w[gid], self._h[gid] = rect
+        self._angle[gid] = angle is True
+        self._fill[gid] = fill
+        self._stroke[gid] = stroke
         if text is not None:
-            t = self._dom.createElement('text')
-            t.setAttribute('alignment-baseline', 'middle')
-            t.setAttribute('text-anchor', 'middle')
-            t.setAttribute('font-family', 'Times,serif')
-            t.setAttribute('x', '{:.2f}'.format(rect[0]+rect[2]*0.5))
-            t.setAttribute('y', '{:.2f}'.format(rect[1]+rect[3]*0.5))
-            t.setAttribute('font-size', '{:.2f}'.format(util.text_font_size(rect[2], '{}'.format(text))))
-            t.setAttribute('fill', util.auto_text_color(fill))
-            tt = self._dom.createTextNode('{}'.format(text))
-            t.appendChild(tt)
-            g.appendChild(t)
-        return int(gid)
-    
+            text = '{}'.format(text)
+            self._text[gid] = text
+            self._tx[gid] = rect[0]+rect[2]*0.5
+            self._ty[gid] = rect[1]+rect[3]*0.5
+            self._tfs[gid] = util.text_font_size(rect[2], text)
+        return gid
+
     '''
     pos:(x,y) 文本左下角坐标位置。
     text:str 文本内容。
@@ -79,22 +74,13 @@ class SvgTable():
     fill:(R,G,B) 字体轮廓颜色。
     '''
     def add_text_element(self, pos, text, font_size=16, fill=(123,123,123)):
-        gid = str(self._cur_id)
-        self._cur_id += 1
-        g = self._dom.createElement('g')
-        g.setAttribute('id', gid)
-        self._svg.appendChild(g)
-        t = self._dom.createElement('text')
-        t.setAttribute('x', '{:.2f}'.format(pos[0]))
-        t.setAttribute('y', '{:.2f}'.format(pos[1]))
-        t.setAttribute('font-size', '{:.2f}'.format(font_size))
-        t.setAttribute('font-family', 'Times,serif')
-        t.setAttribute('fill', util.rgbcolor2str(fill))
-        tt = self._dom.createTextNode('{}'.format(text))
-        t.appendChild(tt)
-        g.appendChild(t)
-        return int(gid)
-    
+        gid = self._new_element_(_TEXT)
+        self._x[gid], self._y[gid] = pos
+        self._text[gid] = '{}'.format(text)
+        self._tfs[gid] = font_size
+        self._fill[gid] = fill
+        return gid
+
     '''
     gid:int 要更新的矩形元素的ID值。
     rect:(x, y, w, h) 矩形移动的距离和矩形尺寸。
@@ -104,63 +90,47 @@ class SvgTable():
     opacity:bool 是否显示矩形。
     '''
     def update_rect_element(self, gid, rect=None, text=None, fill=None, stroke=None, opacity=None):
-        g = util.find_tag_by_id(self._svg, 'g', str(gid))
-        if g is None:
+        if gid < 0 or gid >= self._cur_id or self._kind[gid] != _RECT:
             return
-        r = g.getElementsByTagName('rect')[0]
-        t = g.getElementsByTagName('text')
         if opacity is not None:
-            g.setAttribute('style', 'opacity:{:.0f}'.format(opacity))
+            self._style[gid] = 'opacity:{:.0f}'.format(opacity)
         if fill is not None:
-            r.setAttribute('fill', util.rgbcolor2str(fill))
-            if len(t):
-                t[0].setAttribute('fill', util.auto_text_color(fill))
+            self._fill[gid] = fill
         if rect is not None:
-            r.setAttribute('x', '{:.2f}'.format(rect[0]))
-            r.setAttribute('y', '{:.2f}'.format(rect[1]))
-            r.setAttribute('width', '{:.2f}'.format(rect[2]))
-            r.setAttribute('height', '{:.2f}'.format(rect[3]))
-            if r.getAttribute('rx') != '':
-                r.setAttribute('rx', '{:.2f}'.format(min(rect[2],rect[3])*0.1))
-                r.setAttribute('ry', '{:.2f}'.format(min(rect[2],rect[3])*0.1))
-            if len(t):
-                t[0].setAttribute('x', '{:.2f}'.format(rect[0]+rect[2]*0.5))
-                t[0].setAttribute('y', '{:.2f}'.format(rect[1]+rect[3]*0.5))
-                new_font = util.text_font_size(rect[2], '{}'.format(t[0].firstChild.nodeValue))
-                t[0].setAttribute('font-size', '{:.2f}'.format(new_font))
+            self._x[gid], self._y[gid], self._w[gid], self._h[gid] = rect
+            if self._text[gid] is not None:
+                self._tx[gid] = rect[0]+rect[2]*0.5
+                self._ty[gid] = rect[1]+rect[3]*0.5
+                self._tfs[gid] = util.text_font_size(rect[2], self._text[gid])
         if text is not None:
-            if len(t) == 0:
-                t = self._dom.createElement('text')
-                g.appendChild(t)
-            else:
-                t = t[0]
-            rx = float(r.getAttribute('x'))
-            ry = float(r.getAttribute('y'))
-            width = float(r.getAttribute('width'))
-            height = float(r.getAttribute('height'))
-            fc = util.str2rgbcolor(r.getAttribute('fill'))
-            t.setAttribute('alignment-baseline', 'middle')
-            t.setAttribute('text-anchor', 'middle')
-            t.setAttribute('font-family', 'Times,serif')
-            t.setAttribute('x', '{:.2f}'.format(rx+width*0.5))
-            t.setAttribute('y', '{:.2f}'.format(ry+height*0.5))
-            t.setAttribute('font-size', '{:.2f}'.format(util.text_font_size(width, '{}'.format(text))))
-            t.setAttribute('fill', util.auto_text_color(fc))
-            for t_child in t.childNodes:
-                t.removeChild(t_child)
-            tt = self._dom.createTextNode('{}'.format(text))
-            t.appendChild(tt)
+            if self._text[gid] is None and len(self._animates.get(gid, ())) > 0:
+                self._text_pos[gid] = len(self._animates[gid])
+            # 与矩形属性的字符串精度保持一致。
+            rx = float('{:.2f}'.format(self._x[gid]))
+            ry = float('{:.2f}'.format(self._y[gid]))
+            width = float('{:.2f}'.format(self._w[gid]))
+            height = float('{:.2f}'.format(self._h[gid]))
+            text = '{}'.format(text)
+            self._text[gid] = text
+            self._tx[gid] = rx+width*0.5
+            self._ty[gid] = ry+height*0.5
+            self._tfs[gid] = util.text_font_size(width, text)
         if stroke is not None:
-            r.setAttribute('stroke', util.rgbcolor2str(stroke))
-    
+            self._stroke[gid] = stroke
+
     '''
     gid:int 要删除的元素的ID值。
     '''
     def delete_element(self, gid):
-        g = util.find_tag_by_id(self._svg, 'g', str(gid))
-        if g is not None:
-            self._svg.removeChild(g)
-    
+        if gid < 0 or gid >= self._cur_id or self._kind[gid] is None:
+            return
+        self._kind[gid] = None
+        self._x[gid] = self._y[gid] = self._w[gid] = self._h[gid] = None
+        self._fill[gid] = self._stroke[gid] = self._text[gid] = None
+        self._tx[gid] = self._ty[gid] = self._tfs[gid] = self._style[gid] = None
+        self._animates.pop(gid, None)
+        self._text_pos.pop(gid, None)
+
     '''
     gid:int 要移动元素的索引值。
     move:(delt_x, delt_y)对象分别沿x和y轴的移动。
@@ -168,30 +138,152 @@ class SvgTable():
     bessel:代表是否沿贝塞尔曲线路径运动。
     '''
     def add_animate_move(self, gid, move, time, bessel=True):
-        g = util.find_tag_by_id(self._svg, 'g', str(gid))
-        if g is not None:
-            animate = self._dom.createElement('animateMotion')
-            util.add_animate_move_into_node(g, animate, move, time, bessel)
-    
+        if gid < 0 or gid >= self._cur_id or self._kind[gid] is None:
+            return
+        animate = util.animate_move_xml(move, time, bessel)
+        self._animates.setdefault(gid, list()).append((False, animate))
+
     '''
     gid:int对应显示单元元素的id。
     time:(begin, end)动画开始和结束时间。
     appear:代表是出现动画还是消失动画。
     '''
     def add_animate_appear(self, gid, time, appear=True):
-        g = util.find_tag_by_id(self._svg, 'g', str(gid))
-        if g is not None:
-            animate = self._dom.createElement('animate')
-            util.add_animate_appear_into_node(g, animate, time, appear)
-    
+        if gid < 0 or gid >= self._cur_id or self._kind[gid] is None:
+            return
+        self._style[gid] = 'opacity:{:.0f}'.format(not appear)
+        animate = util.animate_appear_xml(time, appear)
+        self._animates.setdefault(gid, list()).append((True, animate))
+
     '''
     清除该SVG中所有的动画效果。
     '''
     def clear_animates(self):
-        util.clear_svg_animates(self._svg)
-    
+        for gid, animates in self._animates.items():
+            for (appear, _) in animates:
+                if appear:
+                    self._style[gid] = None
+                    break
+        self._animates.clear()
+        self._text_pos.clear()
+
+    '''
+    gid:int 矩形元素的id值。
+    返回：(x, y, w, h) 矩形的位置和尺寸，元素不存在时返回None。
+    '''
+    def get_rect(self, gid):
+        if gid < 0 or gid >= self._cur_id or self._kind[gid] != _RECT:
+            return None
+        return (self._x[gid], self._y[gid], self._w[gid], self._h[gid])
+
+    '''
+    返回：SvgTable 当前状态的副本（只复制平行数组，可以在其它线程中生成XML字符串）。
+    '''
+    def snapshot(self):
+        res = copy.copy(self)
+        for name in ('_kind', '_x', '_y', '_w', '_h', '_angle', '_fill', '_stroke', '_text', '_tx', '_ty', '_tfs', '_style'):
+            setattr(res, name, list(getattr(self, name)))
+        res._animates = {gid: list(animates) for (gid, animates) in self._animates.items()}
+        res._text_pos = dict(self._text_pos)
+        return res
+
     '''
     返回：该SVG对应的XML字符串，用于notebook中的显示。
     '''
     def _repr_svg_(self):
-        return self._dom.toxml()
+        return self._to_xml_(0, self._width, range(self._cur_id))
+
+    '''
+    功能：只输出SVG中的一部分元素，视图从横坐标x开始（用于超长数组的局部显示）。
+    x:float 视图左侧的横坐标。
+    width:float 视图的宽度。
+    gids:list(int) 要输出的元素id。
+    overlay:str 追加在所有元素之后的XML字符串（使用SVG的绝对坐标）。
+    返回：str 视图的XML字符串。
+    '''
+    def view_xml(self, x, width, gids, overlay=''):
+        return self._to_xml_(x, width, sorted(gids), overlay)
+
+    '''
+    x/width:float 视图左侧的横坐标和视图宽度。
+    gids:iterable(int) 按id顺序排列的要输出的元素。
+    overlay:str 追加在所有元素之后的XML字符串。
+    返回：str XML字符串。
+    '''
+    def _to_xml_(self, x, width, gids, overlay=''):
+        res = ['<?xml version="1.0" ?><svg width="{:.0f}pt" height="{:.0f}pt" viewBox="{:.2f} 0.00 {:.2f} {:.2f}" xmlns="http://www.w3.org/2000/svg"'.format(
+            width, self._height, x, width, self._height)]
+        empty = True
+        for gid in gids:
+            kind = self._kind[gid]
+            if kind is None:
+                continue
+            if empty:
+                res.append('>')
+                empty = False
+            if self._style[gid] is None:
+                res.append('<g id="{}">'.format(gid))
+            else:
+                res.append('<g id="{}" style="{}">'.format(gid, self._style[gid]))
+            animates = self._animates.get(gid, ())
+            if kind == _RECT:
+                res.append(self._rect_xml_(gid))
+                pos = self._text_pos.get(gid, 0)
+                for (_, animate) in animates[:pos]:
+                    res.append(animate)
+                if self._text[gid] is not None:
+                    res.append(self._rect_text_xml_(gid))
+                animates = animates[pos:]
+            else:
+                res.append('<text x="{:.2f}" y="{:.2f}" font-size="{:.2f}" font-family="Times,serif" fill="{}">{}</text>'.format(
+                    self._x[gid], self._y[gid], self._tfs[gid], util.rgbcolor2str(self._fill[gid]), util.xml_escape(self._text[gid])))
+            for (_, animate) in animates:
+                res.append(animate)
+            res.append('</g>')
+        if len(overlay) > 0:
+            if empty:
+                res.append('>')
+                empty = False
+            res.append(overlay)
+        if empty:
+            res.append('/>')
+        else:
+            res.append('</svg>')
+        return ''.join(res)
+
+    '''
+    kind:int 新元素的类型。
+    返回:int 新元素的id值。
+    '''
+    def _new_element_(self, kind):
+        gid = self._cur_id
+        self._cur_id += 1
+        self._kind.append(kind)
+        for attrs in (self._x, self._y, self._w, self._h, self._angle, self._fill, self._stroke,
+                      self._text, self._tx, self._ty, self._tfs, self._style):
+            attrs.append(None)
+        return gid
+
+    '''
+    gid:int 矩形元素的id值。
+    返回:str 矩形的XML字符串（不包括内部文本）。
+    '''
+    def _rect_xml_(self, gid):
+        w, h = self._w[gid], self._h[gid]
+        fill = self._fill[gid]
+        if self._angle[gid]:
+            corner = min(w, h)*0.1
+            res = '<rect x="{:.2f}" y="{:.2f}" width="{:.2f}" height="{:.2f}" rx="{:.2f}" ry="{:.2f}" fill="{}" stroke="{}"/>'.format(
+                self._x[gid], self._y[gid], w, h, corner, corner, util.rgbcolor2str(fill), util.rgbcolor2str(self._stroke[gid]))
+        else:
+            res = '<rect x="{:.2f}" y="{:.2f}" width="{:.2f}" height="{:.2f}" fill="{}" stroke="{}"/>'.format(
+                self._x[gid], self._y[gid], w, h, util.rgbcolor2str(fill), util.rgbcolor2str(self._stroke[gid]))
+        return res
+
+    '''
+    gid:int 矩形元素的id值。
+    返回:str 矩形内部文本的XML字符串。
+    '''
+    def _rect_text_xml_(self, gid):
+        return '<text alignment-baseline="middle" text-anchor="middle" font-family="Times,serif" x="{:.2f}" y="{:.2f}" font-size="{:.2f}" fill="{}">{}</text>'.format(
+            self._tx[gid], self._ty[gid], self._tfs[gid], util.auto_text_color(self._fill[gid]), util.xml_escape(self._text[gid]))
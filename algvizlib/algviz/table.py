@@ -5,9 +5,21 @@
 @license:GPLv3
 '''
 
+import math
+import warnings
+
 import svg_table
 import utility
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+_heatmap_threshold = 10000  # 单元格数量超过该值时自动使用热力图模式显示。
+_heatmap_blocks = 100       # 热力图模式下每个方向上最多的色块数量。
+_heatmap_block_px = 6       # 热力图模式下色块的边长。
+
 '''
 表格对象中指定某一行的迭代器。
 '''
@@ -51,21 +63,46 @@ class Table():
     '''
     row:int 表格行数。
     col:int 表格列数。
-    data:list(list(...)) 初始化数据。
+    data:list(list(...))/numpy.ndarray 初始化数据（二维numpy数组会被直接用作表格的数据，不进行拷贝）。
     cell_size:float 单元格宽度。
     show_index:bool 是否显示表格行列标签。
+    heatmap:bool 是否以降采样的热力图显示表格（每个色块聚合多个单元格的轨迹颜色和数值），为None时单元格数量超过阈值自动使用。
     '''
-    def __init__(self, row, col, data, cell_size, show_index=True):
+    def __init__(self, row, col, data, cell_size, show_index=True, heatmap=None):
         if row <=0 or col <=0:
             raise Exception('Table row/col error!')
         self._row = row
         self._col = col
-        self._cell_tcs = dict()           # (cell trace color stack)记录所有单元格的轨迹访问信息（节点索引：ColorStack）信息。
-        self._frame_trace_old = list()    # 缓存上一帧需要清除的单元格相关信息（节点索引，轨迹颜色值）。
-        self._frame_trace = list()        # 记录下一帧待刷新的单元格相关信息(节点索引，轨迹颜色值，是否持久化)。
+        self._cell_tcs = utility.TraceColorStore(row*col)  # (cell trace color store)记录所有单元格（索引为r*col+c）的轨迹访问信息。
+        self._frame_trace_old = dict()    # 缓存上一帧需要清除的单元格相关信息（轨迹颜色值：单元格索引集合）。
+        self._frame_trace = dict()        # 记录下一帧待刷新的单元格相关信息((轨迹颜色值，是否持久化)：单元格索引集合)。
         self._delay = 0                   # 用于适配Visualizer，无实际用途。
+        self._begin = 0                   # 用于适配Visualizer，无实际用途。
         self._next_row = 0                # 用于表格的行迭代中标记当前迭代到哪一行。
-        self._data = [[None for _ in range(col)] for _ in range(row)]
+        self._dirty = True                # 上一次显示后是否有需要刷新的变化。
+        self._text_update = set()         # 批量修改后需要在显示时重新生成文本的单元格索引（热力图模式下为数值变化的单元格）。
+        self._show_index = show_index     # 是否显示表格行列标签。
+        self._heatmap = 0                 # 热力图模式下每个色块的边长（包含的单元格行/列数），0代表逐个显示单元格。
+        self._block_mean = None           # 热力图模式下每个色块中数值的平均值（非数值的色块为None）。
+        if heatmap is None:
+            heatmap = row*col > _heatmap_threshold
+        if heatmap:
+            self._heatmap = max(1, math.ceil(max(row, col) / _heatmap_blocks))
+        if np is not None and isinstance(data, np.ndarray):
+            if data.ndim != 2 or data.shape[0] < row or data.shape[1] < col:
+                raise Exception('Table data shape error!')
+            self._data = data[:row, :col]   # numpy数组的视图，与外部数组共享数据。
+            data = None
+        else:
+            self._data = [[None for _ in range(col)] for _ in range(row)]
+        if self._heatmap > 0:
+            # 热力图模式下不创建单元格的SVG元素。
+            if data is not None:
+                for r in range(row):
+                    self._data[r] = [data[r][c] for c in range(col)]
+            self._svg = None
+            self._text_update.update(range(row*col))
+            return
         label_font_size = int(min(12, cell_size/len(str(max(row,col)-1))))
         table_margin = 3
         svg_width = col*cell_size + table_margin*2
@@ -80,7 +117,6 @@ class Table():
                     self._data[r][c] = data[r][c]
                 rect = (c*cell_size+table_margin, r*cell_size+table_margin, cell_size, cell_size)
                 self._svg.add_rect_element(rect, self._data[r][c], angle=False)
-                self._cell_tcs[r*col+c] = utility.TraceColorStack()
         if show_index:
             for r in range(row):
                 pos = (col*cell_size+table_margin*2, (r+0.5)*cell_size+label_font_size*0.5+table_margin)
@@ -98,16 +134,77 @@ class Table():
         if r < 0 or r >= self._row or c < 0 or c >= self._col:
             raise Exception("Table index out of range!")
         gid = r*self._col + c
-        self._cell_tcs[gid].add(color)
-        self._frame_trace.append((gid, color, hold))
+        self._cell_tcs.add(gid, color)
+        self._frame_trace.setdefault((color, hold), set()).add(gid)
+        self._dirty = True
+    
+    '''
+    功能：一次性标记表格中的一个区域（多行和多列的交叉部分）。
+    color:(R, G, B) 标记的颜色。
+    rows/cols:int/slice/range/list(int) 标记的行/列索引（单个索引、区间或索引列表，slice(None)代表整行/整列）。
+    hold:bool 是否持久化标记。
+    '''
+    def markRegion(self, color, rows, cols, hold=True):
+        rows = self._region_indices_(rows, self._row)
+        cols = self._region_indices_(cols, self._col)
+        self._mark_gids_(color, [r*self._col + c for r in rows for c in cols], hold)
+    
+    '''
+    功能：一次性标记表格中的多个单元格，支持以下三种形式：
+    1. 单元格行列索引(r, c)组成的列表或其它可迭代对象（集合、生成器、zip等），如[(0, 1), (2, 3)]；
+    2. 行索引和列索引两个numpy数组组成的元组（numpy.nonzero的返回值），如np.nonzero(mask)；
+    3. 与表格尺寸相同的布尔掩码（numpy布尔数组或list(list(bool))）。
+    其它形式的元组（如((0, 1), (2, 3))）按单元格行列索引列表处理。
+    color:(R, G, B) 标记的颜色。
+    cells:... 要标记的单元格。
+    hold:bool 是否持久化标记。
+    '''
+    def markCells(self, color, cells, hold=True):
+        gids = list()
+        if np is not None and isinstance(cells, tuple) and len(cells) == 2 and \
+                isinstance(cells[0], np.ndarray) and isinstance(cells[1], np.ndarray):
+            # 行索引和列索引两个数组（numpy.nonzero的返回值）。
+            if cells[0].shape != cells[1].shape:
+                raise Exception("Table cells shape error!")
+            cells = zip(cells[0].tolist(), cells[1].tolist())
+        else:
+            if np is None or not isinstance(cells, np.ndarray):
+                # 生成器、集合等不能按下标访问，先转换为列表再判断是否为布尔掩码。
+                cells = list(cells)
+            if self._is_mask_(cells):
+                if len(cells) != self._row or any(len(row_mask) != self._col for row_mask in cells):
+                    raise Exception("Table mask shape error!")
+                for r in range(self._row):
+                    row_mask = cells[r]
+                    gids.extend(r*self._col + c for c in range(self._col) if row_mask[c])
+                cells = ()
+        for (r, c) in cells:
+            if r < 0 or r >= self._row or c < 0 or c >= self._col:
+                raise Exception("Table index out of range!")
+            gids.append(int(r)*self._col + int(c))
+        self._mark_gids_(color, gids, hold)
+    
+    '''
+    cells:... markCells的参数。
+    返回：bool 是否为布尔掩码形式。
+    '''
+    def _is_mask_(self, cells):
+        dtype = getattr(cells, 'dtype', None)
+        if dtype is not None:
+            return dtype.kind == 'b'
+        if len(cells) == 0 or isinstance(cells[0], tuple) or not hasattr(cells[0], '__len__') or len(cells[0]) == 0:
+            return False
+        first = cells[0][0]
+        return isinstance(first, bool) or (np is not None and isinstance(first, np.bool_))
     
     '''
     color:(R, G, B) 将要被删除的颜色标记对象。
     '''
     def removeMark(self, color):
-        for gid in range(self._row*self._col):
-            if self._cell_tcs[gid].remove(color):
-                self._svg.update_rect_element(gid, fill=self._cell_tcs[gid].color())
+        for gid in self._cell_tcs.remove_all(color):
+            if self._svg is not None:
+                self._svg.update_rect_element(gid, fill=self._cell_tcs.color(gid))
+            self._dirty = True
     
     '''
     r/c:int 要访问元素在表格中的行列位置。
@@ -116,8 +213,9 @@ class Table():
         if r < 0 or r >= self._row or c < 0 or c >= self._col:
             raise Exception("Table index out of range!")
         gid = r*self._col + c
-        self._cell_tcs[gid].add(utility._getElemColor)
-        self._frame_trace.append((gid, utility._getElemColor, False))
+        self._cell_tcs.add(gid, utility._getElemColor)
+        self._frame_trace.setdefault((utility._getElemColor, False), set()).add(gid)
+        self._dirty = True
         return self._data[r][c]
     
     '''
@@ -128,20 +226,72 @@ class Table():
         if r < 0 or r >= self._row or c < 0 or c >= self._col:
             raise Exception("Table index out of range!")
         gid = r*self._col + c
-        self._cell_tcs[gid].add(utility._setElemColor)
-        self._frame_trace.append((gid, utility._setElemColor, False))
-        label = val
-        if val is None:
-            label = ''
-        self._svg.update_rect_element(gid, text=label)
+        self._cell_tcs.add(gid, utility._setElemColor)
+        self._frame_trace.setdefault((utility._setElemColor, False), set()).add(gid)
+        if self._svg is None:
+            self._text_update.add(gid)
+        else:
+            self._svg.update_rect_element(gid, text='' if val is None else val)
         self._data[r][c] = val
+        self._dirty = True
     
     '''
-    r:int 要访问的行索引。
-    返回：TabRowIter 迭代器对象。
+    r:int/(rows, cols) 要访问的行索引，或行列索引/区间组成的元组（如tab[2:5, :]）。
+    返回：TableRowOperator 行操作对象，或区域内的数据（numpy数组模式下返回数组的视图）。
     '''
     def __getitem__(self, r):
-        return TableRowOperator(r, self)
+        if not isinstance(r, tuple):
+            return TableRowOperator(r, self)
+        (rows, cols) = r
+        (row_scalar, col_scalar) = (self._is_scalar_index_(rows), self._is_scalar_index_(cols))
+        if row_scalar and col_scalar:
+            return self.getItem(rows, cols)
+        row_indices = self._region_indices_(rows, self._row)
+        col_indices = self._region_indices_(cols, self._col)
+        self._mark_gids_(utility._getElemColor, [i*self._col + j for i in row_indices for j in col_indices], False)
+        if not isinstance(self._data, list):
+            return self._data[self._numpy_region_(rows, cols, row_indices, col_indices)]
+        res = [[self._data[i][j] for j in col_indices] for i in row_indices]
+        if row_scalar:
+            return res[0]
+        if col_scalar:
+            return [line[0] for line in res]
+        return res
+    
+    '''
+    功能：修改表格中一个区域的数据（整个区域只记录一条轨迹信息，单元格文本在显示时批量更新）。
+    key:(rows, cols) 行列索引/区间组成的元组（如tab[2:5, :]）。
+    val:... 新的值（单个值会被赋给区域内的所有单元格，否则形状需要与区域相同）。
+    '''
+    def __setitem__(self, key, val):
+        if not isinstance(key, tuple):
+            raise Exception('Table region index error!')
+        (rows, cols) = key
+        (row_scalar, col_scalar) = (self._is_scalar_index_(rows), self._is_scalar_index_(cols))
+        if row_scalar and col_scalar:
+            return self.setItem(rows, cols, val)
+        row_indices = self._region_indices_(rows, self._row)
+        col_indices = self._region_indices_(cols, self._col)
+        if not isinstance(self._data, list):
+            self._data[self._numpy_region_(rows, cols, row_indices, col_indices)] = val
+        else:
+            scalar = isinstance(val, str) or not hasattr(val, '__len__')
+            if not scalar:
+                self._check_region_value_(val, row_scalar, col_scalar, len(row_indices), len(col_indices))
+            for i in range(len(row_indices)):
+                for j in range(len(col_indices)):
+                    if scalar:
+                        v = val
+                    elif row_scalar:
+                        v = val[j]
+                    elif col_scalar:
+                        v = val[i]
+                    else:
+                        v = val[i][j]
+                    self._data[row_indices[i]][col_indices[j]] = v
+        gids = [i*self._col + j for i in row_indices for j in col_indices]
+        self._text_update.update(gids)
+        self._mark_gids_(utility._setElemColor, gids, False)
     
     def __iter__(self):
         self._next_row = 0
@@ -155,18 +305,193 @@ class Table():
             self._next_row += 1
             return res
     
+    '''
+    功能：批量标记多个单元格（整个区域只记录一条轨迹信息）。
+    '''
+    def _mark_gids_(self, color, gids, hold):
+        if len(gids) == 0:
+            return
+        self._cell_tcs.add_many(gids, color)
+        self._frame_trace.setdefault((color, hold), set()).update(gids)
+        self._dirty = True
+    
+    '''
+    indices:int/slice/range/list(int) 行或列的索引。
+    size:int 表格的行数或列数。
+    返回：list(int) 索引列表。
+    '''
+    def _region_indices_(self, indices, size):
+        if isinstance(indices, slice):
+            return range(*indices.indices(size))
+        if not hasattr(indices, '__iter__'):
+            indices = [indices]
+        for i in indices:
+            if i < 0 or i >= size:
+                raise Exception("Table index out of range!")
+        return indices
+    
+    '''
+    功能：numpy数组模式下区域的索引。行和列都是索引列表时使用np.ix_取交叉部分（与列表模式一致），
+    而不是按numpy的规则将行列索引逐个配对；其它情况直接使用原索引，区间索引返回数组的视图。
+    返回：tuple numpy数组的索引。
+    '''
+    def _numpy_region_(self, rows, cols, row_indices, col_indices):
+        if isinstance(rows, slice) or isinstance(cols, slice) or self._is_scalar_index_(rows) or self._is_scalar_index_(cols):
+            return (rows, cols)
+        return np.ix_(list(row_indices), list(col_indices))
+    
+    '''
+    功能：检查赋给区域的值的形状，形状不符时在修改任何单元格之前报错。
+    val:... 赋给区域的值（非单个值）。
+    row_scalar/col_scalar:bool 行/列是否为单个索引。
+    nr/nc:int 区域的行数和列数。
+    '''
+    def _check_region_value_(self, val, row_scalar, col_scalar, nr, nc):
+        if row_scalar or col_scalar:
+            valid = len(val) == (nc if row_scalar else nr)
+        else:
+            valid = len(val) == nr and all(hasattr(line, '__len__') and not isinstance(line, str) and len(line) == nc for line in val)
+        if not valid:
+            raise Exception("Table region value shape error!")
+    
+    '''
+    indices:... 行或列的索引。
+    返回：bool 是否为单个索引（区间和索引列表会保留该维度）。
+    '''
+    def _is_scalar_index_(self, indices):
+        return not isinstance(indices, slice) and not hasattr(indices, '__iter__')
+    
     '''
     返回:str 表格当前状态下的SVG表示。
     '''
     def _repr_svg_(self):
-        for (gid, color) in self._frame_trace_old:
-            if (gid, color, True) not in self._frame_trace and (gid, color, False) not in self._frame_trace:
-                self._cell_tcs[gid].remove(color)
-            self._svg.update_rect_element(gid, fill=self._cell_tcs[gid].color())
-        self._frame_trace_old.clear()
-        for (gid, color, hold) in self._frame_trace:
-            self._svg.update_rect_element(gid, fill=self._cell_tcs[gid].color())
-            if not hold:
-                self._frame_trace_old.append((gid, color))
-        self._frame_trace.clear()
-        return self._svg._repr_svg_()
+        return self._render_(False)
+    
+    '''
+    功能：生成一帧并更新表格的状态，XML字符串可以稍后在其它线程中生成（用于后台刷新）。
+    返回：SvgTable/str 该帧SVG的快照。
+    '''
+    def _frame_(self):
+        return self._render_(True)
+    
+    '''
+    snapshot:bool 是否返回SVG的快照（而不是XML字符串）。
+    返回：SvgTable/str 表格当前状态下的SVG表示。
+    '''
+    def _render_(self, snapshot):
+        if self._heatmap > 0:
+            return self._heatmap_svg_()
+        for gid in self._text_update:
+            val = self._data[gid // self._col][gid % self._col]
+            self._svg.update_rect_element(gid, text='' if val is None else val)
+        self._text_update.clear()
+        (expired, touched) = utility.merge_frame_trace(self._frame_trace, self._frame_trace_old)
+        for (color, gids) in expired.items():
+            for gid in gids:
+                self._cell_tcs.remove(gid, color)
+        for gid in touched:
+            self._svg.update_rect_element(gid, fill=self._cell_tcs.color(gid))
+        # 还有需要在下一帧清除的临时标记时，下一帧仍需刷新。
+        self._dirty = len(self._frame_trace_old) > 0
+        return self._svg.snapshot() if snapshot else self._svg._repr_svg_()
+    
+    '''
+    功能：以降采样的热力图显示表格，每个色块聚合多个单元格：有轨迹标记的色块显示标记颜色，否则按数值平均值显示深浅（同色的相邻色块合并输出）。
+    返回:str 表格当前状态下的SVG表示。
+    '''
+    def _heatmap_svg_(self):
+        (expired, _) = utility.merge_frame_trace(self._frame_trace, self._frame_trace_old)
+        for (color, gids) in expired.items():
+            for gid in gids:
+                self._cell_tcs.remove(gid, color)
+        bs = self._heatmap
+        (nbr, nbc) = (math.ceil(self._row/bs), math.ceil(self._col/bs))
+        self._update_block_mean_(nbr, nbc)
+        marks = dict()
+        for gid in self._cell_tcs.marked_cells():
+            block = (gid // self._col // bs) * nbc + (gid % self._col) // bs
+            if gid > marks.get(block, -1):
+                marks[block] = gid
+        values = [v for v in self._block_mean if v is not None]
+        (low, high) = (min(values), max(values)) if len(values) > 0 else (0, 0)
+        (px, margin) = (_heatmap_block_px, 3)
+        label_font_size = 10
+        (width, height) = (nbc*px + margin*2, nbr*px + margin*2)
+        if self._show_index:
+            width += len(str(self._row-1))*label_font_size*0.6 + margin
+            height += label_font_size
+        res = ['<?xml version="1.0" ?><svg width="{:.0f}pt" height="{:.0f}pt" viewBox="0.00 0.00 {:.2f} {:.2f}" xmlns="http://www.w3.org/2000/svg">'.format(
+            width, height, width, height)]
+        for br in range(nbr):
+            fills = list()
+            for bc in range(nbc):
+                block = br*nbc + bc
+                if block in marks:
+                    fills.append(utility.rgbcolor2str(self._cell_tcs.color(marks[block])))
+                elif self._block_mean[block] is None:
+                    fills.append('#ffffff')
+                else:
+                    level = 245 if high <= low else int(245 - (self._block_mean[block]-low)/(high-low)*185)
+                    fills.append(utility.rgbcolor2str((level, level, level)))
+            bc = 0
+            while bc < nbc:
+                end = bc + 1
+                while end < nbc and fills[end] == fills[bc]:
+                    end += 1
+                res.append('<rect x="{}" y="{}" width="{}" height="{}" fill="{}" stroke="none"/>'.format(
+                    bc*px+margin, br*px+margin, (end-bc)*px, px, fills[bc]))
+                bc = end
+        res.append('<rect x="{}" y="{}" width="{}" height="{}" fill="none" stroke="#7b7b7b"/>'.format(margin, margin, nbc*px, nbr*px))
+        if self._show_index:
+            # 每隔10个色块标记一次该色块起始单元格的行/列索引。
+            for br in range(0, nbr, 10):
+                res.append('<text x="{}" y="{:.2f}" font-size="{}" font-family="Times,serif" fill="#7b7b7b">{}</text>'.format(
+                    nbc*px+margin*2, br*px+margin+label_font_size*0.8, label_font_size, br*bs))
+            for bc in range(0, nbc, 10):
+                res.append('<text x="{}" y="{}" font-size="{}" font-family="Times,serif" fill="#7b7b7b">{}</text>'.format(
+                    bc*px+margin, nbr*px+margin+label_font_size+1, label_font_size, bc*bs))
+        res.append('</svg>')
+        self._dirty = len(self._frame_trace_old) > 0
+        return ''.join(res)
+    
+    '''
+    功能：更新热力图中每个色块的数值平均值，只重新计算数值有变化的色块
+    （numpy数值数组在第一次显示或变化的色块较多时整体计算）。
+    nbr/nbc:int 色块的行数和列数。
+    '''
+    def _update_block_mean_(self, nbr, nbc):
+        bs = self._heatmap
+        blocks = set((gid // self._col // bs) * nbc + (gid % self._col) // bs for gid in self._text_update)
+        numeric = not isinstance(self._data, list) and self._data.dtype.kind in 'biuf'
+        if numeric and (self._block_mean is None or len(blocks) > nbr*nbc // 4):
+            padded = np.full((nbr*bs, nbc*bs), np.nan)
+            padded[:self._row, :self._col] = self._data
+            with warnings.catch_warnings():
+                # 全部为NaN的色块会产生警告，其平均值记为None。
+                warnings.simplefilter('ignore')
+                means = np.nanmean(padded.reshape(nbr, bs, nbc, bs), axis=(1, 3))
+            self._block_mean = [None if math.isnan(v) else v for v in means.ravel().tolist()]
+            self._text_update.clear()
+            return
+        if self._block_mean is None:
+            self._block_mean = [None] * (nbr*nbc)
+        self._text_update.clear()
+        for block in blocks:
+            (br, bc) = (block // nbc * bs, block % nbc * bs)
+            if numeric:
+                with warnings.catch_warnings():
+                    warnings.simplefilter('ignore')
+                    mean = float(np.nanmean(self._data[br:br+bs, bc:bc+bs]))
+                self._block_mean[block] = None if math.isnan(mean) else mean
+                continue
+            (total, count) = (0, 0)
+            for r in range(br, min(br+bs, self._row)):
+                for c in range(bc, min(bc+bs, self._col)):
+                    if self._data[r][c] is None:
+                        continue
+                    try:
+                        total += float(self._data[r][c])
+                        count += 1
+                    except (TypeError, ValueError):
+                        pass
+            self._block_mean[block] = total/count if count > 0 else None
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+
+'''
+@author:zjluestc@outlook.com
+@license:GPLv3
+'''
+
+import tree
+import link_list
+import graph_layout
+
+_node_radius = 18       # 节点圆的半径（与graphviz中circle节点的默认尺寸一致）。
+_rank_sep = 72          # 相邻两层节点中心之间的距离。
+_node_sep = 54          # 同一层相邻节点中心之间的最小距离。
+
+'''
+记录一棵子树在每一层上最左侧和最右侧节点的相对位置（Reingold-Tilford算法中的轮廓线）。
+为了在父节点上方追加新层时只需O(1)时间，列表按深度逆序保存（最后一个元素是子树的根节点所在层），
+列表中的值加上对应的偏移量才是相对于子树根节点的实际位置。
+'''
+class _Contour():
+    __slots__ = ('left', 'lshift', 'right', 'rshift')
+
+    def __init__(self):
+        self.left = [0]
+        self.lshift = 0
+        self.right = [0]
+        self.rshift = 0
+
+'''
+nodes:list 拓扑图中所有节点。
+返回：bool 是否可以使用内置的树/链表排版引擎（不调用graphviz）。
+'''
+def supported(nodes):
+    for node in nodes:
+        if not isinstance(node, (tree.TreeNode, link_list.ListNode)):
+            return False
+    return True
+
+'''
+功能：对树/链表类型的拓扑图进行分层排版。
+nodes:list 按拓扑顺序排列的所有节点。
+node_idmap:ConsecutiveIdMap 节点和排版结果中节点id之间的映射关系。
+horizontal:bool 是否横向排版。
+返回：GraphLayout 排版结果（边没有路径信息，生成SVG时使用节点之间的直线）。
+'''
+def layout(nodes, node_idmap, horizontal):
+    positions = _layout_positions_(nodes)
+    width, height = 0, 0
+    if len(positions) > 0:
+        for node in positions.keys():
+            (lateral, depth) = positions[node]
+            positions[node] = (depth, lateral) if horizontal else (lateral, depth)
+        min_x = min(x for (x, _) in positions.values())
+        min_y = min(y for (_, y) in positions.values())
+        for node in positions.keys():
+            (x, y) = positions[node]
+            positions[node] = (x - min_x + _node_radius, y - min_y + _node_radius)
+        width = max(x for (x, _) in positions.values()) + _node_radius
+        height = max(y for (_, y) in positions.values()) + _node_radius
+    res = graph_layout.GraphLayout(width, height)
+    # 转换为y轴向上的坐标系。
+    for node in nodes:
+        (x, y) = positions[node]
+        res.nodes[node_idmap.toConsecutiveId(node)] = (x, height - y, _node_radius)
+    return res
+
+'''
+功能：使用Reingold-Tilford算法计算每个节点的位置。
+nodes:list 按拓扑顺序排列的所有节点。
+返回：dict 节点到(横向位置, 纵向位置)的映射关系。
+'''
+def _layout_positions_(nodes):
+    (roots, children) = _spanning_forest_(nodes)
+    # 后序遍历计算每个子节点相对于父节点的偏移量。
+    offsets = dict()
+    contours = dict()
+    stack = [(root, False) for root in reversed(roots)]
+    while len(stack) > 0:
+        (node, expanded) = stack.pop()
+        if not expanded:
+            stack.append((node, True))
+            for (_, child) in reversed(children[node]):
+                stack.append((child, False))
+            continue
+        subtrees = children[node]
+        if len(subtrees) == 0:
+            contours[node] = _Contour()
+            continue
+        child_nodes = [child for (_, child) in subtrees]
+        (contour, child_pos) = _place_subtrees_(child_nodes, contours)
+        center = (child_pos[0] + child_pos[-1]) * 0.5
+        if len(subtrees) == 1 and isinstance(node, tree.TreeNode):
+            # 二叉树中只有一个子节点时，子节点偏向其所在的一侧。
+            center += _node_sep * 0.5 if subtrees[0][0] == 0 else -_node_sep * 0.5
+        for i in range(len(child_nodes)):
+            offsets[child_nodes[i]] = child_pos[i] - center
+        contour.lshift -= center
+        contour.rshift -= center
+        contour.left.append(-contour.lshift)
+        contour.right.append(-contour.rshift)
+        contours[node] = contour
+    # 将所有的树并排放置，再自顶向下计算绝对位置。
+    (_, root_pos) = _place_subtrees_(roots, contours)
+    positions = dict()
+    stack = list()
+    for i in range(len(roots)):
+        positions[roots[i]] = (root_pos[i], 0)
+        stack.append(roots[i])
+    while len(stack) > 0:
+        node = stack.pop()
+        (x, y) = positions[node]
+        for (_, child) in children[node]:
+            positions[child] = (x + offsets[child], y + _rank_sep)
+            stack.append(child)
+    return positions
+
+'''
+功能：从左到右依次紧凑地放置多棵子树（消耗子树的轮廓线）。
+subtrees:list 子树的根节点。
+contours:dict 子树根节点到其轮廓线的映射关系。
+返回：(_Contour, list) 合并后的轮廓线，每棵子树根节点相对于第一棵子树的位置。
+'''
+def _place_subtrees_(subtrees, contours):
+    acc = None
+    positions = list()
+    for node in subtrees:
+        cur = contours.pop(node)
+        if acc is None:
+            acc = cur
+            positions.append(0)
+            continue
+        # 计算当前子树与已放置子树在每一层上都不重叠的最小偏移量。
+        offset = None
+        common = min(len(acc.right), len(cur.left))
+        for j in range(1, common+1):
+            sep = acc.right[-j] + acc.rshift - cur.left[-j] - cur.lshift + _node_sep
+            if offset is None or sep > offset:
+                offset = sep
+        positions.append(offset)
+        cur.lshift += offset
+        cur.rshift += offset
+        # 合并左轮廓：较浅的层使用已放置的子树，更深的层使用当前子树。
+        if len(cur.left) > len(acc.left):
+            for j in range(1, len(acc.left)+1):
+                cur.left[-j] = acc.left[-j] + acc.lshift - cur.lshift
+            acc.left, acc.lshift = cur.left, cur.lshift
+        # 合并右轮廓：较浅的层使用当前子树，更深的层使用已放置的子树。
+        if len(acc.right) > len(cur.right):
+            for j in range(1, len(cur.right)+1):
+                acc.right[-j] = cur.right[-j] + cur.rshift - acc.rshift
+        else:
+            acc.right, acc.rshift = cur.right, cur.rshift
+    if acc is None:
+        acc = _Contour()
+    return (acc, positions)
+
+'''
+功能：按照节点的拓扑顺序构造生成森林（环和多个父节点的情况下，节点只属于第一个访问到它的父节点）。
+nodes:list 按拓扑顺序排列的所有节点。
+返回：(list, dict) 所有树的根节点，节点到[(在父节点中的位置，子节点)]的映射关系。
+'''
+def _spanning_forest_(nodes):
+    node_set = set(nodes)
+    visited = set()
+    roots = list()
+    children = dict()
+    for node in nodes:
+        children[node] = list()
+    for root in nodes:
+        if root in visited:
+            continue
+        roots.append(root)
+        visited.add(root)
+        stack = [root]
+        while len(stack) > 0:
+            cur_node = stack.pop()
+            neighbors = cur_node._neighbors_()
+            for slot in range(len(neighbors)):
+                child = neighbors[slot][0]
+                if child is None or child not in node_set or child in visited:
+                    continue
+                visited.add(child)
+                children[cur_node].append((slot, child))
+                stack.append(child)
+    return (roots, children)
@@ -5,6 +5,7 @@
 @license:GPLv3
 '''
 
+import array
 import xml.dom.minidom as xmldom
 
 _getElemColor = (0, 255, 127)      # SpringGreen
@@ -48,6 +49,168 @@ class TraceColorStack():
             return self._bgcolor
         return self._colors[-1]
 
+'''
+以紧凑数组的形式保存大量元素（Vector/Table中的所有单元格）上的颜色栈：每一层颜色是一个数组（每个元素一个压缩的RGB整数），
+另外用一个数组记录每个元素上颜色栈的深度。与TraceColorStack的行为一致。
+'''
+class TraceColorStore():
+    '''
+    size:int 初始元素数量（元素索引为0~size-1）。
+    bgcolor:(R,G,B) 没有颜色标记时的背景颜色。
+    '''
+    def __init__(self, size=0, bgcolor=(255, 255, 255)):
+        self._bgcolor = bgcolor
+        self._depth = array.array('i', [0]) * size  # 每个元素上颜色栈的深度，-1代表该元素不存在。
+        self._layers = list()                       # 每一层中所有元素的颜色值（-1代表该层为空）。
+        self._color_cells = dict()                  # 颜色值到当前带有该颜色的元素索引集合的映射关系。
+
+    '''
+    index:int 要添加的元素索引（大于当前元素数量时自动扩充）。
+    '''
+    def add_cell(self, index):
+        if index >= len(self._depth):
+            grow = index + 1 - len(self._depth)
+            self._depth.extend(array.array('i', [-1]) * grow)
+            for layer in self._layers:
+                layer.extend(array.array('i', [-1]) * grow)
+        self._clear_cell_(index)
+        self._depth[index] = 0
+
+    '''
+    index:int 要删除的元素索引。
+    '''
+    def remove_cell(self, index):
+        if index in self:
+            for k in range(self._depth[index]):
+                self._color_cells[self._layers[k][index]].discard(index)
+            self._clear_cell_(index)
+            self._depth[index] = -1
+
+    '''
+    index:int 元素索引。
+    color:(R,G,B) 待添加的颜色值，与栈顶颜色相同时不再添加。
+    '''
+    def add(self, index, color):
+        depth = self._depth[index]
+        packed = (color[0] << 16) | (color[1] << 8) | color[2]
+        if depth > 0 and self._layers[depth-1][index] == packed:
+            return
+        if depth == len(self._layers):
+            self._layers.append(array.array('i', [-1]) * len(self._depth))
+        self._layers[depth][index] = packed
+        self._depth[index] = depth + 1
+        self._color_cells.setdefault(packed, set()).add(index)
+
+    '''
+    indices:list(int) 多个元素索引。
+    color:(R,G,B) 待添加的颜色值，与栈顶颜色相同的元素不再添加。
+    '''
+    def add_many(self, indices, color):
+        packed = (color[0] << 16) | (color[1] << 8) | color[2]
+        depth_arr, layers = self._depth, self._layers
+        added = list()
+        for index in indices:
+            depth = depth_arr[index]
+            if depth > 0 and layers[depth-1][index] == packed:
+                continue
+            if depth == len(layers):
+                layers.append(array.array('i', [-1]) * len(depth_arr))
+            layers[depth][index] = packed
+            depth_arr[index] = depth + 1
+            added.append(index)
+        self._color_cells.setdefault(packed, set()).update(added)
+
+    '''
+    index:int 元素索引。
+    color:(R,G,B) 待删除的颜色值。
+    返回值：(bool)False：color不在该元素的颜色栈中；True：成功删除颜色。
+    '''
+    def remove(self, index, color):
+        depth = self._depth[index]
+        packed = (color[0] << 16) | (color[1] << 8) | color[2]
+        colors = [self._layers[k][index] for k in range(depth)]
+        remains = [c for c in colors if c != packed]
+        if len(remains) == len(colors):
+            return False
+        for k in range(depth):
+            self._layers[k][index] = remains[k] if k < len(remains) else -1
+        self._depth[index] = len(remains)
+        if packed in self._color_cells:
+            self._color_cells[packed].discard(index)
+        return True
+
+    '''
+    color:(R,G,B) 待删除的颜色值。
+    exclude:iterable(int) 保留该颜色的元素索引（例如已经被删除、还要以原来的颜色播放消失动画的元素）。
+    返回：list 成功删除了该颜色的所有元素索引（只访问带有该颜色的元素）。
+    '''
+    def remove_all(self, color, exclude=()):
+        packed = (color[0] << 16) | (color[1] << 8) | color[2]
+        cells = self._color_cells.pop(packed, None)
+        if cells is None:
+            return list()
+        kept = set(index for index in exclude if index in cells)
+        res = sorted(cells - kept)
+        for index in res:
+            self.remove(index, color)
+        if len(kept) > 0:
+            self._color_cells[packed] = kept
+        return res
+
+    '''
+    返回：set 带有颜色标记的所有元素索引。
+    '''
+    def marked_cells(self):
+        res = set()
+        for cells in self._color_cells.values():
+            res |= cells
+        return res
+
+    '''
+    index:int 元素索引。
+    返回：融合后的颜色值(R,G,B)。
+    '''
+    def color(self, index):
+        depth = self._depth[index]
+        if depth <= 0:
+            return self._bgcolor
+        packed = self._layers[depth-1][index]
+        return (packed >> 16, (packed >> 8) & 255, packed & 255)
+
+    def __contains__(self, index):
+        return 0 <= index < len(self._depth) and self._depth[index] >= 0
+
+    '''
+    功能：清空一个元素上的所有颜色。
+    '''
+    def _clear_cell_(self, index):
+        for k in range(max(self._depth[index], 0)):
+            self._layers[k][index] = -1
+
+_empty_set = frozenset()
+
+'''
+功能：合并两帧之间的轨迹标记，找出上一帧的临时标记中本帧没有被重新标记的颜色（只遍历被标记过的元素）。
+frame_trace:dict 本帧的标记信息（(颜色, 是否持久化)：元素集合），调用后被清空。
+frame_trace_old:dict 上一帧的临时标记信息（颜色：元素集合），调用后更新为本帧的临时标记信息。
+返回：(dict, set) 需要从元素上清除的颜色（颜色：元素集合），本帧中颜色可能发生变化的所有元素。
+'''
+def merge_frame_trace(frame_trace, frame_trace_old):
+    expired = dict()
+    touched = set()
+    for (color, keys) in frame_trace_old.items():
+        stale = keys - frame_trace.get((color, False), _empty_set) - frame_trace.get((color, True), _empty_set)
+        if len(stale) > 0:
+            expired[color] = stale
+        touched |= keys
+    frame_trace_old.clear()
+    for ((color, hold), keys) in frame_trace.items():
+        touched |= keys
+        if not hold:
+            frame_trace_old.setdefault(color, set()).update(keys)
+    frame_trace.clear()
+    return (expired, touched)
+
 '''
 为可哈希对象分配连续的整数空间。
 '''
@@ -138,6 +301,35 @@ def add_animate_appear_into_node(g, animate, time, appear=True):
     animate.setAttribute('dur', '{:.2f}s'.format(time[1]-time[0]))
     animate.setAttribute('fill', 'freeze')
 
+'''
+move:(delt_x, delt_y)对象分别沿x和y轴的移动。
+time:(begin, end)动画开始和结束时间。
+bessel:代表是否沿贝塞尔曲线路径运动。
+返回：str 与add_animate_move_into_node等价的<animateMotion>元素的XML字符串。
+'''
+def animate_move_xml(move, time, bessel):
+    if bessel:
+        path = 'm0,0 q{:.2f},{:.2f} {:.2f},{:.2f}'.format(move[0]*0.5-move[1]*0.2, move[1]*0.5+move[0]*0.2, move[0], move[1])
+    else:
+        path = 'm0,0 l{:.2f},{:.2f}'.format(move[0], move[1])
+    return '<animateMotion path="{}" begin="{:.2f}s" dur="{:.2f}s" fill="freeze"/>'.format(path, time[0], time[1]-time[0])
+
+'''
+time:(begin, end)动画开始和结束时间。
+appear:代表是出现动画还是消失动画。
+返回：str 与add_animate_appear_into_node等价的<animate>元素的XML字符串（不包括对<g>元素style属性的修改）。
+'''
+def animate_appear_xml(time, appear=True):
+    return '<animate attributeName="opacity" from="{:.0f}" to="{:.0f}" begin="{:.2f}s" dur="{:.2f}s" fill="freeze"/>'.format(
+        not appear, appear, time[0], time[1]-time[0])
+
+'''
+text:str 要写入XML中的文本或属性值。
+返回：str 转义后的字符串（与xml.dom.minidom的输出保持一致）。
+'''
+def xml_escape(text):
+    return text.replace('&', '&amp;').replace('<', '&lt;').replace('"', '&quot;').replace('>', '&gt;')
+
 '''
 back_color:三个10进制数字(R,G,B)表示的文本背景颜色。
 返回：16进制表示的(#RGB)格式的文本颜色字符串。
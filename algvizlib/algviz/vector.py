@@ -5,9 +5,43 @@
 @license:GPLv3
 '''
 
+import weakref
+
 import svg_table
 import utility as util
 
+'''
+Vector的迭代器，每个迭代器独立记录迭代位置（支持对同一个Vector的嵌套迭代）。
+'''
+class VectorIter():
+    '''
+    vec:Vector 绑定的数组对象。
+    trace:str 轨迹标记策略：'each'标记每个访问过的元素，'cursor'只在显示时标记当前迭代位置的元素，'none'不做标记。
+    '''
+    def __init__(self, vec, trace='each'):
+        if trace not in ('each', 'cursor', 'none'):
+            raise Exception('Unknown iterator trace policy: {}'.format(trace))
+        self._vec = vec
+        self._trace = trace
+        self._index = -1    # 上一次返回的元素的下标。
+        if trace == 'cursor':
+            vec._iter_cursors.add(self)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        vec = self._vec
+        if self._index + 1 >= len(vec._data):
+            vec._iter_cursors.discard(self)
+            raise StopIteration
+        self._index += 1
+        if self._trace == 'each':
+            return vec[self._index]
+        if self._trace == 'cursor':
+            vec._dirty = True
+        return vec._data[self._index]
+
 class Vector():
     '''
     data:list(...) 初始化数据。
@@ -15,27 +49,44 @@ class Vector():
     cell_size:float 单元格宽度。
     bar:float 如果bar值小于零则忽略，否则以柱状图形式显示数据。
     show_index:bool 是否显示下标标签。
+    view:int/(int, int) 超长数组的视图窗口：整数代表窗口长度并自动跟随最近访问的元素，元组(start, length)代表固定的窗口位置。
     '''
-    def __init__(self, data, delay, cell_size, bar=-1, show_index=True):
+    def __init__(self, data, delay, cell_size, bar=-1, show_index=True, view=None):
         self._data = list()             # 保存数组中的数据。
         if data is not None:
             for i in range(len(data)):
                 self._data.append(data[i])
         self._delay = delay             # 动画延迟时间。
+        self._begin = 0                 # 动画开始时间（用于连续播放排队的多帧动画）。
         self._cell_size = cell_size     # 单元格的宽度。
         self._bar = bar                 # 是否以柱状图形式显示数值高度（也包含SVG的高度信息）。
         self._show_index = show_index   # 是否显示下标标签。
         self._cell_margin = 3           # 矩形框之间的边距。
-        self._cell_tcs = dict()         # (cell trace color stack)记录所有单元格的轨迹访问信息（节点索引：ColorStack）信息。
-        self._frame_trace_old = list()  # 缓存上一帧需要清除的单元格相关信息（节点索引，轨迹颜色值）。
-        self._frame_trace = list()      # 记录下一帧待刷新的单元格相关信息(节点索引，轨迹颜色值，是否持久化)。
+        self._cell_tcs = util.TraceColorStore()  # (cell trace color store)记录所有单元格（以矩形id为索引）的轨迹访问信息。
+        self._frame_trace_old = dict()  # 缓存上一帧需要清除的单元格相关信息（轨迹颜色值：矩形id集合）。
+        self._frame_trace = dict()      # 记录下一帧待刷新的单元格相关信息((轨迹颜色值，是否持久化)：矩形id集合)。
         self._rect_move = dict()        # 记录下一帧动画中移动的矩形索引和其相对移动距离。
         self._rect_disappear = list()   # 记录下一帧动画中消失的矩形索引。
-        self._rect_appear = list()      # 记录下一帧动画中出现的矩形索引。
+        self._rect_appear = set()       # 记录下一帧动画中出现的矩形索引。
         self._index2rect = dict()       # 数组下标到显示矩形对象id的映射关系。
         self._index2text = list()       # 数组下标到下标显示文本对象id的映射关系。
         self._label_font_size = int(min(12, cell_size*0.5))   # 下标索引的字体大小。
-        self._next_iter = 0             # 标记当前迭代位置。
+        self._iter_cursors = weakref.WeakSet()  # 以'cursor'策略迭代中的迭代器（显示时标记其当前位置）。
+        self._dirty = True              # 上一次显示后是否有需要刷新的变化。
+        self._text_update = dict()      # 批量赋值后需要在显示时更新文本的矩形（矩形id：新的文本）。
+        self._bar_low = 0               # 柱状图模式下数据范围的下限（不大于0）。
+        self._bar_high = 0              # 柱状图模式下数据范围的上限（不小于0）。
+        self._bar_range_valid = False   # 增量维护的数据范围是否有效（删除了最值时需要重新计算）。
+        self._bar_scale = None          # 柱状图上一次使用的(比率, 基线位置)。
+        self._bar_update = set()        # 柱状图模式下数值发生变化，需要重新绘制的矩形id。
+        self._view = None               # 视图窗口(起始下标, 长度)，为None时显示整个数组。
+        self._view_follow = False       # 视图窗口是否自动跟随最近访问的元素。
+        self._focus = None              # 最近访问（读写、标记、插入删除等）的元素下标。
+        self._strip_height = 8          # 视图模式下底部概览条占用的高度。
+        if isinstance(view, tuple):
+            self.setView(view[1], view[0], follow=False)
+        elif view is not None:
+            self.setView(view)
         svg_height = cell_size + 2*self._cell_margin
         if self._show_index:
             svg_height += self._label_font_size
@@ -45,7 +96,7 @@ class Vector():
         for i in range(len(self._data)):
             rect = (cell_size*i+self._cell_margin*(i+1), self._cell_margin, cell_size, cell_size)
             rid = self._svg.add_rect_element(rect, text=self._data[i])
-            self._cell_tcs[rid] = util.TraceColorStack()
+            self._cell_tcs.add_cell(rid)
             self._index2rect[i] = rid
         if self._bar > 0:
             self._update_bar_height_()
@@ -76,9 +127,12 @@ class Vector():
             else:
                 self._rect_move[rrid] = 1
         self._index2rect[index] = rid
-        self._cell_tcs[rid] = util.TraceColorStack()
-        self._rect_appear.append(rid)
+        self._cell_tcs.add_cell(rid)
+        self._rect_appear.add(rid)
+        self._bar_value_changed_(rid, None, val)
         self._data.insert(index, val)
+        self._focus = index
+        self._dirty = True
     
     '''
     val:... 要添加的值。
@@ -88,9 +142,12 @@ class Vector():
         rect = (self._cell_size*index+self._cell_margin*(index+1), self._cell_margin, self._cell_size, self._cell_size)
         rid = self._svg.add_rect_element(rect, text=val)
         self._index2rect[index] = rid
-        self._cell_tcs[rid] = util.TraceColorStack()
-        self._rect_appear.append(rid)
+        self._cell_tcs.add_cell(rid)
+        self._rect_appear.add(rid)
+        self._bar_value_changed_(rid, None, val)
         self._data.append(val)
+        self._focus = index
+        self._dirty = True
     
     '''
     index:int 要删除的元素的位置。
@@ -109,7 +166,10 @@ class Vector():
             else:
                 self._rect_move[rrid] = -1
         self._index2rect.pop(len(self._data)-1)
-        self._rect_disappear.append(rid)
+        self._remove_rect_(rid)
+        self._bar_value_changed_(None, self._data[index], None)
+        self._focus = index
+        self._dirty = True
         return self._data.pop(index)
     
     '''
@@ -118,11 +178,13 @@ class Vector():
     def clear(self):
         for i in range(len(self._data)):
             rid = self._index2rect[i]
-            self._rect_disappear.append(rid)
+            self._remove_rect_(rid)
         self._index2rect.clear()
         self._rect_move.clear()
         self._rect_appear.clear()
         self._data.clear()
+        self._bar_range_valid = False
+        self._dirty = True
     
     '''
     功能：交换Vector中两个元素的位置。
@@ -144,6 +206,8 @@ class Vector():
         temp_data = self._data[index2]
         self._data[index2] = self._data[index1]
         self._data[index1] = temp_data
+        self._focus = index2
+        self._dirty = True
     
     '''
     color:(R,G,B) 添加的标记颜色值。
@@ -157,43 +221,137 @@ class Vector():
             if i < 0 or i >= len(self._data):
                 i %= len(self._data)
             rid = self._index2rect[i]
-            self._cell_tcs[rid].add(color)
-            self._frame_trace.append((rid, color, hold))
+            self._cell_tcs.add(rid, color)
+            self._frame_trace.setdefault((color, hold), set()).add(rid)
+            self._focus = i
+            self._dirty = True
     
     '''
     color:(R,G,B) 将要被删除的颜色标记对象。
     '''
     def removeMark(self, color):
-        for rid in self._index2rect.values():
-            if self._cell_tcs[rid].remove(color):
-                self._svg.update_rect_element(rid, fill=self._cell_tcs[rid].color())
+        # 已经删除、还没有播放消失动画的矩形保留原来的颜色。
+        for rid in self._cell_tcs.remove_all(color, self._rect_disappear):
+            self._svg.update_rect_element(rid, fill=self._cell_tcs.color(rid))
+            self._dirty = True
+    
+    '''
+    功能：设置超长数组的视图窗口，只显示窗口内的元素，并在底部显示标记位置的概览条。
+    length:int 窗口中的元素个数，为None时取消视图窗口（显示整个数组）。
+    start:int 窗口的起始下标。
+    follow:bool 最近访问的元素在窗口之外时，是否自动移动窗口使其居中。
+    '''
+    def setView(self, length=None, start=0, follow=True):
+        if length is None:
+            self._view = None
+        else:
+            if length <= 0:
+                raise Exception('Vector view length error!')
+            self._view = (max(0, start), length)
+        self._view_follow = follow
+        self._dirty = True
     
     '''
-    index:int 要访问对象的索引位置。
+    功能：在数组末尾依次添加多个元素。
+    vals:list(...) 要添加的值。
+    '''
+    def extend(self, vals):
+        for val in vals:
+            self.append(val)
+    
+    '''
+    功能：用新的数据替换数组中的所有元素（长度可以不同）。
+    vals:list(...) 新的数据。
+    '''
+    def assign(self, vals):
+        self[0:len(self._data)] = vals
+    
+    '''
+    index:int/slice 要访问对象的索引位置或区间。
+    返回：... 该位置的值，区间访问时返回值的列表（整个区间只记录一条轨迹信息）。
     '''
     def __getitem__(self, index):
+        if isinstance(index, slice):
+            indices = range(*index.indices(len(self._data)))
+            self._mark_rids_(util._getElemColor, [self._index2rect[i] for i in indices])
+            if len(indices) > 0:
+                self._focus = indices[0]
+            return [self._data[i] for i in indices]
         if index < 0 or index >= len(self._data):
             index %= len(self._data)
         rid = self._index2rect[index]
-        self._cell_tcs[rid].add(util._getElemColor)
-        self._frame_trace.append((rid, util._getElemColor, False))
+        self._cell_tcs.add(rid, util._getElemColor)
+        self._frame_trace.setdefault((util._getElemColor, False), set()).add(rid)
+        self._focus = index
+        self._dirty = True
         return self._data[index]
     
     '''
-    index:int 要赋值对象的索引位置。
-    val:... 对象的新值。
+    index:int/slice 要赋值对象的索引位置或区间。
+    val:... 对象的新值，区间赋值时为值的序列（步长为1的区间可以与序列长度不同，多余的元素被删除，不足的元素被插入）。
     '''
     def __setitem__(self, index, val):
+        if isinstance(index, slice):
+            return self._set_slice_(index, val)
         if index < 0 or index >= len(self._data):
             index %= len(self._data)
         rid = self._index2rect[index]
-        self._cell_tcs[rid].add(util._setElemColor)
-        self._frame_trace.append((rid, util._setElemColor, False))
+        self._text_update.pop(rid, None)
+        self._cell_tcs.add(rid, util._setElemColor)
+        self._frame_trace.setdefault((util._setElemColor, False), set()).add(rid)
         label = val
         if val is None:
             label = ''
         self._svg.update_rect_element(rid, text=label)
+        self._bar_value_changed_(rid, self._data[index], val)
         self._data[index] = val
+        self._focus = index
+        self._dirty = True
+    
+    '''
+    功能：区间赋值，所有被修改的元素只记录一条轨迹信息，文本在显示时批量更新。
+    index:slice 要赋值的区间。
+    vals:list(...) 新的值。
+    '''
+    def _set_slice_(self, index, vals):
+        vals = list(vals)
+        (st, ed, step) = index.indices(len(self._data))
+        indices = range(st, ed, step)
+        if step != 1 and len(indices) != len(vals):
+            raise Exception('Vector slice assignment size error!')
+        common = min(len(indices), len(vals))
+        rids = list()
+        for k in range(common):
+            i = indices[k]
+            rid = self._index2rect[i]
+            self._bar_value_changed_(rid, self._data[i], vals[k])
+            self._data[i] = vals[k]
+            self._text_update[rid] = '' if vals[k] is None else vals[k]
+            rids.append(rid)
+        self._mark_rids_(util._setElemColor, rids)
+        if common > 0:
+            self._focus = st
+        pos = st + common
+        for k in range(common, len(indices)):
+            self.pop(pos)
+        for k in range(common, len(vals)):
+            if pos >= len(self._data):
+                self.append(vals[k])
+            else:
+                self.insert(pos, vals[k])
+            pos += 1
+    
+    '''
+    功能：批量标记多个矩形（只记录一条轨迹信息）。
+    color:(R,G,B) 标记颜色。
+    rids:list(int) 矩形id。
+    '''
+    def _mark_rids_(self, color, rids):
+        if len(rids) == 0:
+            return
+        self._cell_tcs.add_many(rids, color)
+        self._frame_trace.setdefault((color, False), set()).update(rids)
+        self._dirty = True
     
     '''
     返回值：int 数组长度。
@@ -202,21 +360,41 @@ class Vector():
         return len(self._data)
     
     def __iter__(self):
-        self._next_iter = 0
-        return self
+        return VectorIter(self)
     
-    def __next__(self):
-        if self._next_iter >= len(self._data):
-            raise StopIteration
-        else:
-            res = self[self._next_iter]
-            self._next_iter += 1
-            return res
+    '''
+    功能：创建一个指定轨迹标记策略的迭代器（例如：for x in vec.iterate('cursor')）。
+    trace:str 'each'标记每个访问过的元素，'cursor'只在显示时标记当前迭代位置的元素，'none'不做标记。
+    返回：VectorIter 迭代器对象。
+    '''
+    def iterate(self, trace='each'):
+        return VectorIter(self, trace)
     
     '''
     返回：str 数组当前状态下的SVG表示。
     '''
     def _repr_svg_(self):
+        return self._render_(False)
+    
+    '''
+    功能：生成一帧并更新数组的状态，XML字符串可以稍后在其它线程中生成（用于后台刷新）。
+    返回：SvgTable/str 该帧SVG的快照。
+    '''
+    def _frame_(self):
+        return self._render_(True)
+    
+    '''
+    snapshot:bool 是否返回SVG的快照（而不是XML字符串）。
+    返回：SvgTable/str 数组当前状态下的SVG表示。
+    '''
+    def _render_(self, snapshot):
+        for (rid, label) in self._text_update.items():
+            self._svg.update_rect_element(rid, text=label)
+        self._text_update.clear()
+        # 标记所有迭代器的当前位置。
+        for it in self._iter_cursors:
+            if 0 <= it._index < len(self._data):
+                self._mark_rids_(util._getElemColor, [self._index2rect[it._index]])
         # 更新矩形跟踪器的颜色。
         nb_elem = len(self._data) + len(self._rect_disappear)
         svg_height = self._cell_size + 2*self._cell_margin
@@ -224,31 +402,31 @@ class Vector():
             svg_height += self._label_font_size
         if self._bar > 0:
             svg_height = self._bar
-        self._svg.update_svg_size(nb_elem*self._cell_size+(nb_elem+1)*self._cell_margin, svg_height)
-        for (rid, color) in self._frame_trace_old:
-            if rid not in self._cell_tcs.keys():
-                continue
-            if (rid, color, False) not in self._frame_trace and (rid, color, True) not in self._frame_trace:
-                self._cell_tcs[rid].remove(color)
-            self._svg.update_rect_element(rid, fill=self._cell_tcs[rid].color())
-        self._frame_trace_old.clear()
-        for (rid, color, hold) in self._frame_trace:
-            self._svg.update_rect_element(rid, fill=self._cell_tcs[rid].color())
-            if not hold:
-                self._frame_trace_old.append((rid, color))
-        self._frame_trace.clear()
+        full_height = svg_height
+        if self._view is not None:
+            full_height += self._strip_height
+        self._svg.update_svg_size(nb_elem*self._cell_size+(nb_elem+1)*self._cell_margin, full_height)
+        (expired, touched) = util.merge_frame_trace(self._frame_trace, self._frame_trace_old)
+        for (color, rids) in expired.items():
+            for rid in rids:
+                if rid in self._cell_tcs:
+                    self._cell_tcs.remove(rid, color)
+        for rid in touched:
+            if rid in self._cell_tcs:
+                self._svg.update_rect_element(rid, fill=self._cell_tcs.color(rid))
         # 添加矩形出现和消失的动画。
         for rid in self._rect_appear:
-            self._svg.add_animate_appear(rid, (0, self._delay))
+            self._svg.add_animate_appear(rid, (self._begin, self._begin+self._delay))
         for rid in self._rect_disappear:
-            self._svg.add_animate_appear(rid, (0, self._delay), appear=False)
+            self._svg.add_animate_appear(rid, (self._begin, self._begin+self._delay), appear=False)
         # 添加矩形移动的动画。
+        moved = dict(self._rect_move)
         if self._bar > 0:
-            self._update_bar_height_()
+            self._update_bar_height_(moved)
         for rid in self._rect_move.keys():
             if self._rect_move[rid] == 0:
                 continue
-            self._svg.add_animate_move(rid, (self._rect_move[rid]*(self._cell_size+self._cell_margin), 0) , (0, self._delay), bessel=False)
+            self._svg.add_animate_move(rid, (self._rect_move[rid]*(self._cell_size+self._cell_margin), 0) , (self._begin, self._begin+self._delay), bessel=False)
         if self._show_index:
             if len(self._index2text) > len(self._data):
                 for i in range(len(self._index2text)-len(self._data)):
@@ -259,40 +437,130 @@ class Vector():
                     pos = (self._cell_size*(i+0.5)+self._cell_margin*(i+1)-self._label_font_size*0.25*len(str(i)), svg_height)
                     tid = self._svg.add_text_element(pos, i, font_size=self._label_font_size)
                     self._index2text.append(tid)
+        if self._view is None:
+            res = self._svg.snapshot() if snapshot else self._svg._repr_svg_()
+        else:
+            res = self._view_svg_(svg_height)
         self._rect_move.clear()
-        res = self._svg._repr_svg_()
         # 清除动画效果，更新SVG内容，为下一帧做准备。
         self._svg.clear_animates()
         if self._bar > 0:
-            self._update_bar_height_()
+            self._update_bar_height_(moved)
         else:
-            for i in range(len(self._data)):
-                rect = (self._cell_size*i+self._cell_margin*(i+1), self._cell_margin, self._cell_size, self._cell_size)
-                rid = self._index2rect[i]
-                self._svg.update_rect_element(rid, rect=rect)
+            # 只有移动过的矩形需要更新位置。
+            for (rid, move) in moved.items():
+                rect = self._svg.get_rect(rid)
+                if move != 0 and rect is not None:
+                    rect = (rect[0]+move*(self._cell_size+self._cell_margin), rect[1], rect[2], rect[3])
+                    self._svg.update_rect_element(rid, rect=rect)
         for rid in self._rect_disappear:
             self._svg.delete_element(rid)
-            self._cell_tcs.pop(rid)
+            self._cell_tcs.remove_cell(rid)
         self._rect_disappear.clear()
         for rid in self._rect_appear:
             self._svg.update_rect_element(rid, opacity=True)
         self._rect_appear.clear()
+        # 还有需要在下一帧清除的临时标记时，下一帧仍需刷新。
+        self._dirty = len(self._frame_trace_old) > 0
         return res
     
     '''
-    功能：更新柱状图中每个柱子的高度。
+    功能：只输出视图窗口中的元素和动画（以及移入/移出窗口的矩形），并在底部添加概览条。
+    svg_height:float 不包含概览条的SVG高度。
+    返回：str 视图窗口的SVG字符串。
     '''
-    def _update_bar_height_(self):
-        # 根据数据范围调整比率和基线位置。
-        mmax_data, max_data = 0, 0
-        for num in self._data:
-            if num is None:
+    def _view_svg_(self, svg_height):
+        nb_elem = len(self._data)
+        (start, length) = self._view
+        length = min(length, max(nb_elem, 1))
+        if self._view_follow and self._focus is not None and not start <= self._focus < start + length:
+            start = self._focus - length // 2
+        start = max(0, min(start, nb_elem - length))
+        self._view = (start, self._view[1])
+        end = min(start + length, nb_elem)
+        step = self._cell_size + self._cell_margin
+        (x0, width) = (start * step, length * step + self._cell_margin)
+        gids = set(self._index2rect[i] for i in range(start, end))
+        gids.update(self._index2text[start:end])
+        # 移动路径或消失位置与窗口相交的矩形也需要显示。
+        for (rid, move) in list(self._rect_move.items()) + [(rid, 0) for rid in self._rect_disappear]:
+            rect = self._svg.get_rect(rid)
+            if rect is None:
                 continue
-            num = float(num)
-            if num < 0:
-                mmax_data = min(mmax_data, num)
+            (lo, hi) = sorted((rect[0], rect[0] + move*step))
+            if lo < x0 + width and hi + self._cell_size > x0:
+                gids.add(rid)
+        # 概览条：整个数组的缩略图，显示标记的位置和当前窗口。
+        (sx, sy) = (x0 + self._cell_margin, svg_height + 2)
+        (sw, sh) = (width - 2*self._cell_margin, self._strip_height - 3)
+        scale = sw / max(nb_elem, 1)
+        overlay = ['<rect x="{:.2f}" y="{:.2f}" width="{:.2f}" height="{:.2f}" fill="#eeeeee" stroke="none"/>'.format(sx, sy, sw, sh)]
+        marked = self._cell_tcs.marked_cells()
+        if len(marked) > 0:
+            ticks = dict()
+            for (i, rid) in self._index2rect.items():
+                if rid in marked:
+                    ticks[int(i*scale)] = rid
+            for (px, rid) in sorted(ticks.items()):
+                overlay.append('<rect x="{:.2f}" y="{:.2f}" width="{:.2f}" height="{:.2f}" fill="{}" stroke="none"/>'.format(
+                    sx + px, sy, max(1, scale), sh, util.rgbcolor2str(self._cell_tcs.color(rid))))
+        window = max(1, (end - start)*scale)
+        overlay.append('<rect x="{:.2f}" y="{:.2f}" width="{:.2f}" height="{:.2f}" fill="none" stroke="#7b7b7b"/>'.format(
+            sx + min(start*scale, sw - window), sy, window, sh))
+        return self._svg.view_xml(x0, width, gids, ''.join(overlay))
+    
+    '''
+    功能：移除一个矩形，还没有显示过的矩形（在被跳过的帧中添加的）直接删除，否则在下一帧中播放消失动画。
+    rid:int 要移除的矩形id。
+    '''
+    def _remove_rect_(self, rid):
+        if rid in self._rect_appear:
+            self._rect_appear.remove(rid)
+            self._rect_move.pop(rid, None)
+            self._svg.delete_element(rid)
+            self._cell_tcs.remove_cell(rid)
+        else:
+            self._rect_disappear.append(rid)
+
+    '''
+    功能：柱状图模式下记录数值的变化，增量维护数据范围。
+    rid:int 数值发生变化的矩形id（被删除时为None）。
+    old/new:... 旧值和新值（为None时代表没有该值）。
+    '''
+    def _bar_value_changed_(self, rid, old, new):
+        if self._bar <= 0:
+            return
+        if rid is not None:
+            self._bar_update.add(rid)
+        if old is not None:
+            old = float(old)
+            if (old < 0 and old <= self._bar_low) or (old > 0 and old >= self._bar_high):
+                self._bar_range_valid = False
+        if new is not None and self._bar_range_valid:
+            new = float(new)
+            if new < 0:
+                self._bar_low = min(self._bar_low, new)
             else:
-                max_data = max(max_data, num)
+                self._bar_high = max(self._bar_high, new)
+
+    '''
+    功能：更新柱状图中柱子的位置和高度，比率和基线不变时只重新绘制数值变化和移动的柱子。
+    moved:list(int) 有移动的矩形id。
+    '''
+    def _update_bar_height_(self, moved=()):
+        # 根据数据范围调整比率和基线位置。
+        if not self._bar_range_valid:
+            self._bar_low, self._bar_high = 0, 0
+            for num in self._data:
+                if num is None:
+                    continue
+                num = float(num)
+                if num < 0:
+                    self._bar_low = min(self._bar_low, num)
+                else:
+                    self._bar_high = max(self._bar_high, num)
+            self._bar_range_valid = True
+        mmax_data, max_data = self._bar_low, self._bar_high
         if (max_data - mmax_data) < 0.0001:
             ratio = 0
         else:
@@ -301,8 +569,17 @@ class Vector():
                 useful_height -= self._label_font_size
             ratio = useful_height/(max_data-mmax_data)
         baseline = max_data*ratio + self._cell_margin
+        if self._bar_scale != (ratio, baseline):
+            self._bar_scale = (ratio, baseline)
+            indices = range(len(self._data))
+        else:
+            targets = self._bar_update.union(moved)
+            if len(targets) == 0:
+                return
+            indices = [i for (i, rid) in self._index2rect.items() if rid in targets]
+        self._bar_update.clear()
         # 更新矩形的位置坐标。
-        for i in range(len(self._data)):
+        for i in indices:
             if self._data[i] is None:
                 num = 0
             else:
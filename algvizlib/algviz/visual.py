@@ -5,9 +5,13 @@
 @license:GPLv3
 '''
 
+import atexit
 import weakref
 import time
+import queue
+import threading
 from IPython import display
+from IPython import get_ipython
 
 import table
 import vector
@@ -18,26 +22,75 @@ import svg_graph
 import svg_table
 import utility
 import logger
+import frame_sink
 
 class _NoDisplay():
     def _repr_svg_(self):
         return ''
 
+class _SvgFrames():
+    def __init__(self, svg):
+        self._svg = svg
+
+    def _repr_svg_(self):
+        return self._svg
+
+class _TextFrame():
+    def __init__(self, text):
+        self._text = text
+
+    def __repr__(self):
+        return self._text
+
 _next_display_id = 0
     
 class Visualizer(): 
     '''
     delay:float 延时时间长度。
     wait:bool 是否等待按键输入后继续代码。
+    output:str/SvgDirSink/HtmlSink 无界面模式的输出（以.html结尾的路径输出为HTML播放器，其它路径输出为SVG文件目录）。
+    fast:bool 快进模式，display时不等待动画播放，帧被缓存后合并为一个连续播放的SVG动画一次性输出
+    （上一次输出的动画还没有播放完时，新的帧接在其后播放，不等待播放结束）。
+    max_frames:int 快进模式下最多缓存的帧数，达到该数量时自动输出。
+    display_every:int 每调用display多少次才真正刷新一帧（跳过的帧中的移动、出现和消失会合并到下一次刷新的帧中，
+    最后被跳过的帧在调用flush、close或代码单元执行结束时输出）。
+    max_fps:float 每秒最多刷新的帧数，为None时不限制。
+    background:bool 后台刷新模式，display时保存各对象的帧快照，由后台线程刷新显示并等待动画播放，算法代码不需要等待。
+    Vector/Table的快照是SVG元素数组的副本，XML字符串在后台线程中生成；拓扑图、Vector视图窗口和Table热力图的SVG仍在调用线程中生成
+    （拓扑图的排版任务由排版进程池并发执行）。后台线程显示出错时，异常会在下一次调用display或flush时抛出。
+    max_pending:int 后台刷新模式下最多排队等待显示的帧数，达到该数量时display会等待后台线程。
     '''
-    def __init__(self, delay=3.0, wait=False):
+    def __init__(self, delay=3.0, wait=False, output=None, fast=False, max_frames=100, display_every=1, max_fps=None, background=False, max_pending=4):
         self._delay = 3.0         # 动画延时时长。
         if delay > 0:
             self._delay = delay
         self._wait = wait         # 每帧刷新后是否等待。
+        self._sink = None         # 无界面模式下保存每一帧的输出对象。
+        if output is not None:
+            self._sink = frame_sink.create_sink(output)
+            # 程序结束时没有调用close也要结束输出（HTML文件需要写入结尾标签）。
+            atexit.register(self._sink.close)
         self._element2display = weakref.WeakKeyDictionary() # 显示对象到显示id的映射关系。
         self._displayed = set()        # 记录已经被显示的id，若id未被显示，调用display接口，否则调用update接口。
         self._displayid2name = dict()  # 记录对象显示id和对象名称之间的映射关系。
+        self._titles = dict()          # 显示id到对象名称SVG的缓存。
+        self._fast = fast              # 是否为快进模式。
+        self._max_frames = max(max_frames, 1)  # 快进模式下最多缓存的帧数。
+        self._frame_queue = dict()     # 快进模式下显示id到缓存帧列表[(开始时间, 持续时间, SVG)]的映射关系。
+        self._queue_time = 0           # 快进模式下缓存帧的总时长。
+        self._queued_frames = 0        # 快进模式下已缓存的帧数。
+        self._playback_end = 0         # 上一次输出的动画播放结束的时刻。
+        self._published_frames = dict() # 快进模式下显示id到(输出时刻, 已输出的帧列表)的映射关系。
+        self._flush_registered = False # 是否已注册代码单元执行结束后的自动输出。
+        self._display_every = max(display_every, 1)  # 每多少次display调用刷新一帧。
+        self._max_fps = max_fps        # 每秒最多刷新的帧数。
+        self._display_count = 0        # display被调用的次数。
+        self._last_frame_time = None   # 上一次刷新帧的时刻。
+        self._skipped_delay = None     # 上一次刷新之后被跳过的display调用的动画延迟（没有被跳过的调用时为None）。
+        self._background = background  # 是否为后台刷新模式。
+        self._render_queue = queue.Queue(maxsize=max(max_pending, 1))  # 后台刷新模式下等待显示的帧[(显示id, 帧快照)]。
+        self._render_thread = None     # 后台刷新线程。
+        self._render_error = None      # 后台刷新线程中发生的还没有抛出的异常。
         
     '''
     功能：刷新所有已创建的显示对象。
@@ -46,33 +99,36 @@ class Visualizer():
     def display(self, delay=None):
         if delay == None:
             delay = self._delay
+        if self._skip_frame_(delay):
+            # 最后被跳过的帧在flush、close或代码单元执行结束时输出。
+            self._register_flush_()
+            return None
+        return self._render_frame_(delay)
+
+    '''
+    功能：刷新所有已创建的显示对象（不经过帧合并策略）。
+    delay:float 刷新时的动画延迟。
+    '''
+    def _render_frame_(self, delay):
+        self._submit_layouts_()
+        if self._sink is not None:
+            self._write_frame_(delay)
+            return None
         if self._wait == False:
+            if self._fast:
+                self._queue_frame_(delay)
+                return None
+            if self._background:
+                self._enqueue_frame_(delay)
+                return None
             for elem in self._element2display.keyrefs():
                 did = self._element2display[elem()]
-                if did not in self._displayed:
-                    if did in self._displayid2name:
-                        svg_title = svg_table.SvgTable(400, 17)
-                        title_name = '{}:'.format(self._displayid2name[did])
-                        svg_title.add_text_element((4, 14), title_name, font_size=14, fill=(0,0,0))
-                        display.display(svg_title, display_id='algviz_{}'.format(did))
-                    elem()._delay = delay
-                    display.display(elem(), display_id='algviz{}'.format(did))
-                    self._displayed.add(did)
-                else:
-                    if did in self._displayid2name:
-                        svg_title = svg_table.SvgTable(400, 17)
-                        title_name = '{}:'.format(self._displayid2name[did])
-                        svg_title.add_text_element((4, 14), title_name, font_size=14, fill=(0,0,0))
-                        display.update_display(svg_title, display_id='algviz_{}'.format(did))
-                    elem()._delay = delay
-                    display.update_display(elem(), display_id='algviz{}'.format(did))
-            temp_displayed = list(self._displayed)
-            for did in temp_displayed:
-                if did not in self._element2display.values():
-                    if did in self._displayid2name:
-                        display.update_display(_NoDisplay(), display_id='algviz_{}'.format(did))
-                    display.update_display(_NoDisplay(), display_id='algviz{}'.format(did))
-                    self._displayed.remove(did)
+                if did in self._displayed and not elem()._dirty:
+                    # 上一帧之后没有变化的对象不需要重新生成和发送SVG。
+                    continue
+                elem()._delay = delay
+                self._publish_(did, elem())
+            self._remove_deleted_displays_()
             time.sleep(delay)
             return None
         else:
@@ -80,26 +136,300 @@ class Visualizer():
             for elem in self._element2display.keyrefs():
                 did = self._element2display[elem()]
                 if did in self._displayid2name:
-                    svg_title = svg_table.SvgTable(400, 17)
-                    title_name = '{}:'.format(self._displayid2name[did])
-                    svg_title.add_text_element((4, 14), title_name, font_size=14, fill=(0,0,0))
-                    display.display(svg_title, display_id='algviz_{}'.format(did))
+                    display.display(self._title_svg_(did), display_id='algviz_{}'.format(did))
                 elem()._delay = delay
                 display.display(elem(), display_id='algviz{}'.format(did))
                 self._displayed.add(did)
             return input('回车键继续：')
         
+    '''
+    功能：根据帧合并策略判断是否跳过本次刷新（对象中记录的动画和标记会保留到下一次刷新）。
+    delay:float 本次刷新的动画延迟（跳过时记录下来，用于输出最后被跳过的帧）。
+    返回：bool 是否跳过本次刷新。
+    '''
+    def _skip_frame_(self, delay):
+        self._display_count += 1
+        skip = (self._display_count - 1) % self._display_every != 0
+        if not skip and self._max_fps is not None and self._max_fps > 0:
+            now = time.time()
+            if self._last_frame_time is not None and now - self._last_frame_time < 1.0 / self._max_fps:
+                skip = True
+            else:
+                self._last_frame_time = now
+        self._skipped_delay = delay if skip else None
+        return skip
+
+    '''
+    功能：为所有需要刷新的拓扑图提交排版任务，使多个拓扑图的graphviz排版并发执行（显示时再等待排版结果）。
+    '''
+    def _submit_layouts_(self):
+        for elem in self._element2display.keyrefs():
+            obj = elem()
+            if obj is not None and obj._dirty and hasattr(obj, '_submit_layout_'):
+                obj._submit_layout_()
+
+    '''
+    功能：输出所有还没有显示的帧，并结束无界面模式的输出（关闭HTML播放器文件）。
+    '''
+    def close(self):
+        self.flush()
+        if self._sink is not None:
+            self._sink.close()
+
+    '''
+    功能：输出上一次刷新之后被跳过的帧，快进模式下立即输出所有缓存的帧（每个对象输出一个连续播放所有帧的SVG动画）。
+    若上一次输出的动画还没有播放完，未播放的帧会和缓存的帧合并输出，缓存的帧接在其后播放，不需要等待。
+    '''
+    def flush(self):
+        if self._skipped_delay is not None:
+            (delay, self._skipped_delay) = (self._skipped_delay, None)
+            self._render_frame_(delay)
+        if self._render_thread is not None:
+            # 后台刷新模式下等待所有排队的帧显示完毕。
+            self._render_queue.join()
+            self._raise_render_error_()
+        if self._flush_registered:
+            self._flush_registered = False
+            try:
+                ipython = get_ipython()
+                ipython.events.unregister('post_execute', self.flush)
+            except Exception:
+                pass
+        if self._queued_frames == 0:
+            return
+        now = time.time()
+        # 缓存的帧在上一次输出的动画播放结束之后开始播放。
+        base = max(self._playback_end - now, 0)
+        for elem in self._element2display.keyrefs():
+            obj = elem()
+            if obj is None:
+                continue
+            did = self._element2display[obj]
+            if did in self._frame_queue:
+                frames = self._unplayed_frames_(did, now, base)
+                for (begin, dur, svg) in self._frame_queue[did]:
+                    frames.append((begin + base, dur, frame_sink.shift_svg_begin(svg, base)))
+                self._published_frames[did] = (now, frames)
+                self._publish_(did, _SvgFrames(frame_sink.merge_svg_frames(frames)))
+        self._remove_deleted_displays_()
+        self._playback_end = now + base + self._queue_time
+        self._frame_queue = dict()
+        self._queue_time = 0
+        self._queued_frames = 0
+
+    '''
+    did:int 显示id。
+    now:float 当前时刻。
+    base:float 上一次输出的动画还需要播放的时长。
+    返回：list((begin, dur, svg)) 上一次输出的帧中还没有播放完的帧（时间偏移到以当前时刻为起点）。
+    '''
+    def _unplayed_frames_(self, did, now, base):
+        if base <= 0 or did not in self._published_frames:
+            return list()
+        (published, frames) = self._published_frames[did]
+        offset = published - now
+        res = list()
+        for i in range(len(frames)):
+            (begin, dur, svg) = frames[i]
+            end = frames[i+1][0] + offset if i + 1 < len(frames) else base
+            if end > 0:
+                res.append((round(begin + offset, 2) + 0.0, dur, frame_sink.shift_svg_begin(svg, offset)))
+        return res
+
+    '''
+    功能：后台刷新模式下保存所有需要刷新的对象的帧快照并交给后台线程显示（队列已满时等待）。
+    第一次显示的对象需要在当前代码单元中创建显示区域，在调用线程中直接显示。
+    delay:float 该帧的动画延迟。
+    '''
+    def _enqueue_frame_(self, delay):
+        self._raise_render_error_()
+        frames = list()
+        for elem in self._element2display.keyrefs():
+            obj = elem()
+            if obj is None:
+                continue
+            did = self._element2display[obj]
+            if did in self._displayed and not obj._dirty:
+                continue
+            obj._delay = delay
+            frame = self._snapshot_(obj)
+            if did in self._displayed:
+                frames.append((did, frame))
+            else:
+                self._publish_(did, frame)
+        removed = self._take_deleted_displays_()
+        if self._render_thread is None:
+            self._render_thread = threading.Thread(target=self._render_loop_, daemon=True)
+            self._render_thread.start()
+        self._render_queue.put((frames, removed, delay))
+
+    '''
+    功能：后台刷新线程，依次显示队列中的帧并等待动画播放。
+    '''
+    def _render_loop_(self):
+        while True:
+            (frames, removed, delay) = self._render_queue.get()
+            try:
+                for (did, frame) in frames:
+                    display.update_display(frame, display_id='algviz{}'.format(did))
+                self._clear_displays_(removed)
+                time.sleep(delay)
+            except Exception as e:
+                # 记录第一个异常，在调用线程中下一次display或flush时抛出。
+                if self._render_error is None:
+                    self._render_error = e
+            finally:
+                self._render_queue.task_done()
+
+    '''
+    功能：抛出后台刷新线程中发生的异常（只抛出一次）。
+    '''
+    def _raise_render_error_(self):
+        (error, self._render_error) = (self._render_error, None)
+        if error is not None:
+            raise error
+
+    '''
+    obj:... 显示对象。
+    返回：... 对象当前帧的快照（对象的状态会被更新为下一帧做准备）。
+    '''
+    def _snapshot_(self, obj):
+        if hasattr(obj, '_frame_'):
+            frame = obj._frame_()
+        elif hasattr(obj, '_repr_svg_'):
+            frame = obj._repr_svg_()
+        else:
+            return _TextFrame(repr(obj))
+        if isinstance(frame, str):
+            frame = _SvgFrames(frame)
+        return frame
+
+    '''
+    功能：快进模式下缓存所有显示对象的当前帧，帧内动画的开始时间偏移到缓存帧总时长之后。
+    delay:float 该帧的动画延迟。
+    '''
+    def _queue_frame_(self, delay):
+        for elem in self._element2display.keyrefs():
+            obj = elem()
+            if obj is None:
+                continue
+            did = self._element2display[obj]
+            if did in self._frame_queue and not obj._dirty:
+                # 没有变化的对象继续显示缓存中的上一帧。
+                continue
+            obj._delay = delay
+            if hasattr(obj, '_repr_svg_'):
+                obj._begin = self._queue_time
+                svg = obj._repr_svg_()
+                obj._begin = 0
+            else:
+                svg = frame_sink.text_svg(repr(obj))
+            self._frame_queue.setdefault(did, list()).append((self._queue_time, delay, svg))
+        self._queue_time += delay
+        self._queued_frames += 1
+        if self._queued_frames >= self._max_frames:
+            self.flush()
+        else:
+            self._register_flush_()
+
+    '''
+    功能：在notebook中，代码单元执行结束后自动输出剩余的帧（只注册一次）。
+    '''
+    def _register_flush_(self):
+        if self._flush_registered:
+            return
+        try:
+            ipython = get_ipython()
+            ipython.events.register('post_execute', self.flush)
+            self._flush_registered = True
+        except Exception:
+            pass
+
+    '''
+    did:int 显示id。
+    content:... 要显示的对象。
+    功能：显示对象（及其名称），已经显示过的对象则只更新对象的显示内容。
+    '''
+    def _publish_(self, did, content):
+        if did not in self._displayed:
+            # 对象名称不会改变，只需要在第一次显示时输出。
+            if did in self._displayid2name:
+                display.display(self._title_svg_(did), display_id='algviz_{}'.format(did))
+            display.display(content, display_id='algviz{}'.format(did))
+            self._displayed.add(did)
+        else:
+            display.update_display(content, display_id='algviz{}'.format(did))
+
+    '''
+    did:int 显示id。
+    返回：SvgTable 对象名称的SVG（缓存后重复使用）。
+    '''
+    def _title_svg_(self, did):
+        if did not in self._titles:
+            svg_title = svg_table.SvgTable(400, 17)
+            title_name = '{}:'.format(self._displayid2name[did])
+            svg_title.add_text_element((4, 14), title_name, font_size=14, fill=(0,0,0))
+            self._titles[did] = svg_title
+        return self._titles[did]
+
+    '''
+    功能：清除已经被删除的对象的显示内容。
+    '''
+    def _remove_deleted_displays_(self):
+        self._clear_displays_(self._take_deleted_displays_())
+
+    '''
+    返回：list((did, bool)) 已经被删除的对象的显示id和是否显示了名称，同时从已显示的记录中移除。
+    '''
+    def _take_deleted_displays_(self):
+        removed = list()
+        for did in list(self._displayed):
+            if did not in self._element2display.values():
+                removed.append((did, did in self._displayid2name))
+                self._displayed.remove(did)
+                self._titles.pop(did, None)
+                self._published_frames.pop(did, None)
+        return removed
+
+    '''
+    removed:list((did, bool)) 要清除的显示id和是否显示了名称。
+    '''
+    def _clear_displays_(self, removed):
+        for (did, named) in removed:
+            if named:
+                display.update_display(_NoDisplay(), display_id='algviz_{}'.format(did))
+            display.update_display(_NoDisplay(), display_id='algviz{}'.format(did))
+
+    '''
+    功能：无界面模式下，将所有显示对象的当前帧写入输出对象（不等待动画播放）。
+    delay:float 该帧的动画延迟。
+    '''
+    def _write_frame_(self, delay):
+        frames = list()
+        for elem in self._element2display.keyrefs():
+            obj = elem()
+            if obj is None:
+                continue
+            name = self._displayid2name.get(self._element2display[obj])
+            obj._delay = delay
+            if hasattr(obj, '_repr_svg_'):
+                frames.append((name, 'svg', obj._repr_svg_()))
+            else:
+                frames.append((name, 'text', repr(obj)))
+        self._sink.write(frames, delay)
+
     '''
     row:int 表格行数；col:int 表格列数。
     data:list(...) 表格中初始化的数据。
     name:str 表格的名字。
     cell_size:float 表格中单元格的长宽尺寸。
     show_index:bool 是否显示表格行列标签。
+    heatmap:bool 是否以降采样的热力图显示表格，为None时单元格数量较多的表格自动使用。
     返回：创建的表格对象。
     '''
-    def createTable(self, row, col, data=None, name=None, cell_size=40, show_index=True):
+    def createTable(self, row, col, data=None, name=None, cell_size=40, show_index=True, heatmap=None):
         global _next_display_id
-        tab = table.Table(row, col, data, cell_size, show_index)
+        tab = table.Table(row, col, data, cell_size, show_index, heatmap)
         self._element2display[tab] = _next_display_id
         if name is not None:
             self._displayid2name[_next_display_id] = name
@@ -112,11 +442,12 @@ class Visualizer():
     cell_size:float 向量中单元格的长宽尺寸。
     bar:float 如果bar值小于零则忽略，否则以柱状图形式显示数据。
     show_index:bool 是否显示向量下标索引标签。
+    view:int/(int, int) 超长向量的视图窗口（窗口长度，自动跟随最近访问的元素；或固定的(起始下标, 长度)）。
     返回：创建的向量对象。
     '''
-    def createVector(self, data=None, name=None, cell_size=40, bar=-1, show_index=True):
+    def createVector(self, data=None, name=None, cell_size=40, bar=-1, show_index=True, view=None):
         global _next_display_id
-        vec = vector.Vector(data, self._delay, cell_size, bar, show_index)
+        vec = vector.Vector(data, self._delay, cell_size, bar, show_index, view)
         self._element2display[vec] = _next_display_id
         if name is not None:
             self._displayid2name[_next_display_id] = name
@@ -128,11 +459,13 @@ class Visualizer():
     name:str 拓扑图的显示名称。
     directed:bool 是否为有向图。
     horizontal:bool 图是否横向排版。
+    incremental:bool 拓扑结构变化时是否在上一帧排版结果的基础上增量排版（已有节点保持原位置，只放置新节点，
+    适合较大的图；新增的边显示为直线，节点位置与graphviz的排版结果不同）。
     返回：创建的拓扑图可视化对象。
     '''
-    def createGraph(self, data=None, name=None, directed=True, horizontal=True):
+    def createGraph(self, data=None, name=None, directed=True, horizontal=True, incremental=False):
         global _next_display_id
-        gra = svg_graph.SvgGraph(data, directed, self._delay, horizontal)
+        gra = svg_graph.SvgGraph(data, directed, self._delay, horizontal, incremental)
         self._element2display[gra] = _next_display_id
         if name is not None:
             self._displayid2name[_next_display_id] = name
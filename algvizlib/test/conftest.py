@@ -0,0 +1,12 @@
+#!/usr/bin/env python3
+
+'''
+@author:zjluestc@outlook.com
+@license:GPLv3
+'''
+
+import os
+import sys
+
+# algviz中的模块之间直接按模块名导入。
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'algviz'))
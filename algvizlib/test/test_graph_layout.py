@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+
+'''
+@author:zjluestc@outlook.com
+@license:GPLv3
+'''
+
+import xml.dom.minidom as xmldom
+
+import graph_layout
+import utility as util
+
+_plain = '''graph 1 1.5 2
+node 1 0.75 1.5 0.5 0.5 "a b" solid circle black lightgrey
+node 2 0.75 0.5 0.5 0.5 2 solid circle black lightgrey
+edge 1 2 4 0.75 1.25 0.75 1.1 0.75 0.95 0.75 0.8 7 1 1 solid black
+edge 2 1 4 1 0.75 1.1 0.9 1.1 1.1 1 1.25 solid black
+stop
+'''
+
+def test_parse_plain():
+    layout = graph_layout.parse_plain(_plain)
+    assert (layout.width, layout.height) == (108, 144)
+    assert layout.nodes == {1: (54, 108, 18), 2: (54, 36, 18)}
+    (points, label_pos) = layout.edges[(1, 2)]
+    assert points[0] == (54, 90) and len(points) == 4
+    assert label_pos == (72, 72)
+    assert layout.edges[(2, 1)][1] is None
+    # 节点中心在SVG中的坐标（y轴向下，包含边距）。
+    assert layout.node_pos(1) == (58, 40)
+
+def test_parse_plain_stops_at_stop():
+    layout = graph_layout.parse_plain(_plain + 'node 3 1 1 0.5 0.5 3 solid circle black lightgrey\n')
+    assert 3 not in layout.nodes
+
+def _svg_(layout, nodes, edges, directed):
+    idmap = util.ConsecutiveIdMap(1)
+    for node in nodes:
+        idmap.toConsecutiveId(node)
+    return xmldom.parseString(graph_layout.layout_svg(layout, nodes, edges, idmap, directed))
+
+def test_layout_svg_structure():
+    layout = graph_layout.parse_plain(_plain)
+    dom = _svg_(layout, ['a b', 2], {('a b', 2): 7, (2, 'a b'): None}, True)
+    groups = {g.getAttribute('id'): g for g in dom.getElementsByTagName('g')}
+    assert set(groups.keys()) == {'graph0', 'node1', 'node2', 'edge1', 'edge2'}
+    ellipse = groups['node1'].getElementsByTagName('ellipse')[0]
+    assert (ellipse.getAttribute('cx'), ellipse.getAttribute('cy')) == ('54.00', '-108.00')
+    assert groups['node1'].getElementsByTagName('text')[0].firstChild.data == 'a b'
+    # 有向边带箭头，边的标签使用graphviz给出的位置。
+    assert len(groups['edge1'].getElementsByTagName('polygon')) == 1
+    label = groups['edge1'].getElementsByTagName('text')[0]
+    assert (label.getAttribute('x'), label.getAttribute('y'), label.firstChild.data) == ('72.00', '-72.00', '7')
+    assert groups['edge2'].getElementsByTagName('text') == []
+
+def test_layout_svg_straight_edges():
+    layout = graph_layout.GraphLayout(100, 100)
+    layout.nodes = {1: (20, 80, 18), 2: (80, 20, 18)}
+    dom = _svg_(layout, ['x', 'y'], {('x', 'y'): 'w'}, False)
+    edge = [g for g in dom.getElementsByTagName('g') if g.getAttribute('id') == 'edge1'][0]
+    assert edge.getElementsByTagName('polygon') == []
+    label = edge.getElementsByTagName('text')[0]
+    assert (label.getAttribute('x'), label.getAttribute('y')) == ('50.00', '-50.00')
+
+def test_undirected_edge_reversed_in_layout():
+    layout = graph_layout.GraphLayout(100, 100)
+    layout.nodes = {1: (20, 80, 18), 2: (80, 20, 18)}
+    layout.edges[(2, 1)] = ([(80, 38), (70, 50), (40, 60), (20, 62)], None)
+    dom = _svg_(layout, ['x', 'y'], {('x', 'y'): None}, False)
+    path = dom.getElementsByTagName('path')[0].getAttribute('d')
+    assert path.startswith('M20.00,-62.00C')
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+
+'''
+@author:zjluestc@outlook.com
+@license:GPLv3
+'''
+
+import math
+
+import graph_layout
+import incremental_layout as inc
+import utility as util
+
+def _idmap_(nodes):
+    idmap = util.ConsecutiveIdMap(1)
+    for node in nodes:
+        idmap.toConsecutiveId(node)
+    return idmap
+
+def _chain_():
+    # 纵向排列的a->b->c，y轴向上。
+    layout = graph_layout.GraphLayout(54, 198)
+    layout.nodes = {1: (36, 180, 18), 2: (36, 108, 18), 3: (36, 36, 18)}
+    layout.edges[(1, 2)] = ([(36, 162), (36, 150), (36, 138), (36, 126)], None)
+    layout.edges[(2, 3)] = ([(36, 90), (36, 78), (36, 66), (36, 54)], None)
+    return (layout, _idmap_(['a', 'b', 'c']), [('a', 'b'), ('b', 'c')])
+
+def test_no_previous_layout():
+    nodes = ['a']
+    assert inc.relayout(None, None, [], nodes, {}, _idmap_(nodes), True) is None
+    empty = graph_layout.GraphLayout(0, 0)
+    assert inc.relayout(empty, _idmap_([]), [], nodes, {}, _idmap_(nodes), True) is None
+
+def test_large_change_falls_back():
+    (old, old_idmap, old_edges) = _chain_()
+    nodes = ['a', 'b', 'c'] + list(range(20))
+    edges = {('c', n): None for n in range(20)}
+    assert inc.relayout(old, old_idmap, old_edges, nodes, edges, _idmap_(nodes), True) is None
+
+def test_unchanged_graph_keeps_layout():
+    (old, old_idmap, old_edges) = _chain_()
+    nodes = ['a', 'b', 'c']
+    edges = {('a', 'b'): None, ('b', 'c'): None}
+    res = inc.relayout(old, old_idmap, old_edges, nodes, edges, _idmap_(nodes), True)
+    assert res.nodes == old.nodes
+    assert res.edges == old.edges
+
+def test_new_child_placed_below_parent():
+    (old, old_idmap, old_edges) = _chain_()
+    nodes = ['a', 'b', 'c', 'd']
+    edges = {('a', 'b'): None, ('b', 'c'): None, ('c', 'd'): None}
+    idmap = _idmap_(nodes)
+    res = inc.relayout(old, old_idmap, old_edges, nodes, edges, idmap, True)
+    # 图向下扩展，已有节点在SVG中的位置不变。
+    for node in ['a', 'b', 'c']:
+        old_id = old_idmap.toConsecutiveId(node)
+        assert res.node_pos(idmap.toConsecutiveId(node)) == old.node_pos(old_id)
+    (cx, cy) = res.node_pos(3)
+    (dx, dy) = res.node_pos(4)
+    assert dy > cy
+    for i in range(1, 4):
+        (x, y) = res.node_pos(i)
+        assert math.hypot(x - dx, y - dy) >= inc._node_sep - 1
+    # 未移动的节点之间的边沿用原来的路径，与新节点相连的边没有路径。
+    shift = res.nodes[1][1] - old.nodes[1][1]
+    assert res.edges[(1, 2)][0] == [(x, y + shift) for (x, y) in old.edges[(1, 2)][0]]
+    assert (3, 4) not in res.edges
+
+def test_undirected_edge_path_reused():
+    (old, old_idmap, old_edges) = _chain_()
+    nodes = ['a', 'b', 'c']
+    edges = {('b', 'a'): None, ('c', 'b'): None}
+    res = inc.relayout(old, old_idmap, old_edges, nodes, edges, _idmap_(nodes), False)
+    assert res is not None
+    assert res.edges[(1, 2)] == old.edges[(1, 2)]
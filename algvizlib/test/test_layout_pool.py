@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+
+'''
+@author:zjluestc@outlook.com
+@license:GPLv3
+'''
+
+import atexit
+
+import layout_cache
+import layout_pool
+
+def test_failed_probe_disables_workers(monkeypatch):
+    monkeypatch.setattr(layout_pool, '_unsupported', False)
+    pool = layout_pool.LayoutPool(1)
+    try:
+        assert pool.layout('digraph { a -> b }', engine='algviz-no-such-engine') is None
+        assert layout_pool._unsupported
+        # 其它进程池也不再尝试启动常驻进程。
+        started = list()
+        monkeypatch.setattr(layout_pool, 'LayoutWorker', lambda engine: started.append(engine))
+        other = layout_pool.LayoutPool(1)
+        assert other.layout('digraph { a -> b }') is None and started == []
+        other.close()
+    finally:
+        pool.close()
+
+def test_no_pool_on_windows(monkeypatch):
+    monkeypatch.setattr(layout_cache, '_layout_pool', None)
+    monkeypatch.setattr(layout_pool.os, 'name', 'nt')
+    assert layout_cache._get_layout_pool_() is None
+
+def test_pools_not_registered_at_exit(monkeypatch):
+    registered = list()
+    monkeypatch.setattr(atexit, 'register', registered.append)
+    layout_pool.LayoutPool(1).close()
+    assert registered == []
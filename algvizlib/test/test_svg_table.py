@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+
+'''
+@author:zjluestc@outlook.com
+@license:GPLv3
+'''
+
+import xml.dom.minidom as xmldom
+
+import svg_table
+
+def test_empty_svg():
+    svg = svg_table.SvgTable(100, 50)
+    assert svg._repr_svg_() == '<?xml version="1.0" ?><svg width="100pt" height="50pt" viewBox="0.00 0.00 100.00 50.00" xmlns="http://www.w3.org/2000/svg"/>'
+
+def test_rect_and_text_elements():
+    svg = svg_table.SvgTable(100, 50)
+    rid = svg.add_rect_element((3, 3, 40, 40), text='a<b', fill=(255, 0, 0), angle=False)
+    tid = svg.add_text_element((4, 14), 'name', font_size=14, fill=(0, 0, 0))
+    dom = xmldom.parseString(svg._repr_svg_())
+    groups = dom.getElementsByTagName('g')
+    assert [g.getAttribute('id') for g in groups] == [str(rid), str(tid)]
+    rect = groups[0].getElementsByTagName('rect')[0]
+    assert (rect.getAttribute('x'), rect.getAttribute('width'), rect.getAttribute('fill')) == ('3.00', '40.00', '#ff0000')
+    assert not rect.hasAttribute('rx')
+    assert groups[0].getElementsByTagName('text')[0].firstChild.data == 'a<b'
+    assert groups[1].getElementsByTagName('text')[0].firstChild.data == 'name'
+
+def test_update_and_delete():
+    svg = svg_table.SvgTable(100, 50)
+    rid = svg.add_rect_element((3, 3, 40, 40), text=1)
+    other = svg.add_rect_element((46, 3, 40, 40), text=2)
+    svg.update_rect_element(rid, rect=(10, 3, 40, 40), text=5, fill=(0, 0, 255), opacity=False)
+    assert svg.get_rect(rid) == (10, 3, 40, 40)
+    svg.delete_element(other)
+    assert svg.get_rect(other) is None
+    dom = xmldom.parseString(svg._repr_svg_())
+    groups = dom.getElementsByTagName('g')
+    assert len(groups) == 1
+    assert groups[0].getAttribute('style') == 'opacity:0'
+    assert groups[0].getElementsByTagName('rect')[0].getAttribute('fill') == '#0000ff'
+    assert groups[0].getElementsByTagName('text')[0].firstChild.data == '5'
+
+def test_animates_are_cleared():
+    svg = svg_table.SvgTable(100, 50)
+    rid = svg.add_rect_element((3, 3, 40, 40))
+    svg.add_animate_appear(rid, (0, 1))
+    svg.add_animate_move(rid, (10, 0), (0, 1))
+    group = xmldom.parseString(svg._repr_svg_()).getElementsByTagName('g')[0]
+    assert group.getAttribute('style') == 'opacity:0'
+    assert len(group.getElementsByTagName('animate')) == 1
+    assert len(group.getElementsByTagName('animateMotion')) == 1
+    svg.clear_animates()
+    group = xmldom.parseString(svg._repr_svg_()).getElementsByTagName('g')[0]
+    assert not group.hasAttribute('style')
+    assert len(group.childNodes) == 1
+
+def test_snapshot_is_independent():
+    svg = svg_table.SvgTable(100, 50)
+    rid = svg.add_rect_element((3, 3, 40, 40), text=1)
+    svg.add_animate_move(rid, (10, 0), (0, 1))
+    snapshot = svg.snapshot()
+    expected = svg._repr_svg_()
+    svg.update_rect_element(rid, text=2, fill=(0, 0, 0))
+    svg.clear_animates()
+    svg.add_rect_element((46, 3, 40, 40))
+    assert snapshot._repr_svg_() == expected
+
+def test_view_xml():
+    svg = svg_table.SvgTable(300, 50)
+    gids = [svg.add_rect_element((3+i*43, 3, 40, 40), text=i) for i in range(5)]
+    xml = svg.view_xml(89, 86, [gids[3], gids[2]], overlay='<rect id="overlay"/>')
+    dom = xmldom.parseString(xml)
+    assert dom.documentElement.getAttribute('viewBox') == '89.00 0.00 86.00 50.00'
+    assert [g.getAttribute('id') for g in dom.getElementsByTagName('g')] == [str(gids[2]), str(gids[3])]
+    assert xml.endswith('<rect id="overlay"/></svg>')
+
+def test_late_text_follows_existing_animates():
+    svg = svg_table.SvgTable(100, 50)
+    rid = svg.add_rect_element((3, 3, 40, 40))
+    svg.add_animate_appear(rid, (0, 1))
+    svg.add_animate_move(rid, (10, 0), (0, 1))
+    # 已有动画之后才添加的文本输出在这些动画之后，之后添加的动画仍在文本之后。
+    svg.update_rect_element(rid, text=7)
+    svg.add_animate_move(rid, (-10, 0), (1, 2))
+    group = xmldom.parseString(svg.snapshot()._repr_svg_()).getElementsByTagName('g')[0]
+    assert [node.tagName for node in group.childNodes] == ['rect', 'animate', 'animateMotion', 'text', 'animateMotion']
+    svg.update_rect_element(rid, text=8)
+    group = xmldom.parseString(svg._repr_svg_()).getElementsByTagName('g')[0]
+    assert [node.tagName for node in group.childNodes] == ['rect', 'animate', 'animateMotion', 'text', 'animateMotion']
+    svg.clear_animates()
+    svg.add_animate_move(rid, (10, 0), (0, 1))
+    group = xmldom.parseString(svg._repr_svg_()).getElementsByTagName('g')[0]
+    assert [node.tagName for node in group.childNodes] == ['rect', 'text', 'animateMotion']
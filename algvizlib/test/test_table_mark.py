@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+
+'''
+@author:zjluestc@outlook.com
+@license:GPLv3
+'''
+
+import pytest
+
+import table
+
+RED = (255, 0, 0)
+
+'''
+返回：set((r, c)) 当前显示为该颜色的单元格。
+'''
+def _marked_(tab, color=RED):
+    cells = tab._cell_tcs.marked_cells()
+    return set((gid // tab._col, gid % tab._col) for gid in cells if tab._cell_tcs.color(gid) == color)
+
+def test_mark_region():
+    tab = table.Table(4, 5, None, 40)
+    tab.markRegion(RED, slice(1, 3), [0, 4])
+    assert _marked_(tab) == {(1, 0), (1, 4), (2, 0), (2, 4)}
+    tab.markRegion(RED, 3, slice(None))
+    assert len(_marked_(tab)) == 4 + 5
+    with pytest.raises(Exception):
+        tab.markRegion(RED, [4], 0)
+
+def test_mark_cells_pairs():
+    tab = table.Table(3, 4, None, 40)
+    tab.markCells(RED, [(0, 1), (2, 3)])
+    assert _marked_(tab) == {(0, 1), (2, 3)}
+
+def test_mark_cells_iterables():
+    # 生成器、zip和集合只能迭代或不能按下标访问，与列表形式的结果一致。
+    tab = table.Table(3, 4, None, 40)
+    tab.markCells(RED, ((r, r + 1) for r in range(3)))
+    assert _marked_(tab) == {(0, 1), (1, 2), (2, 3)}
+    tab = table.Table(3, 4, None, 40)
+    tab.markCells(RED, zip([0, 2], [1, 3]))
+    assert _marked_(tab) == {(0, 1), (2, 3)}
+    tab = table.Table(3, 4, None, 40)
+    tab.markCells(RED, {(0, 1), (2, 3)})
+    assert _marked_(tab) == {(0, 1), (2, 3)}
+    tab = table.Table(2, 2, None, 40)
+    tab.markCells(RED, ([r == c for c in range(2)] for r in range(2)))
+    assert _marked_(tab) == {(0, 0), (1, 1)}
+
+def test_mark_cells_tuple_of_pairs():
+    # 普通元组按单元格行列索引列表处理，与列表形式一致。
+    tab = table.Table(3, 4, None, 40)
+    tab.markCells(RED, ((0, 1), (2, 3)))
+    assert _marked_(tab) == {(0, 1), (2, 3)}
+
+def test_mark_cells_list_mask():
+    tab = table.Table(2, 3, None, 40)
+    tab.markCells(RED, [[True, False, False], [False, False, True]])
+    assert _marked_(tab) == {(0, 0), (1, 2)}
+    with pytest.raises(Exception):
+        tab.markCells(RED, [[True, False]])
+
+def test_mark_cells_empty():
+    tab = table.Table(2, 3, None, 40)
+    tab.markCells(RED, [])
+    assert _marked_(tab) == set() and not tab._frame_trace
+
+def test_mark_cells_out_of_range():
+    tab = table.Table(2, 3, None, 40)
+    with pytest.raises(Exception):
+        tab.markCells(RED, [(2, 0)])
+
+def test_mark_cells_numpy():
+    np = pytest.importorskip('numpy')
+    tab = table.Table(3, 4, None, 40)
+    mask = np.zeros((3, 4), dtype=bool)
+    tab.markCells(RED, np.nonzero(mask))
+    tab.markCells(RED, mask)
+    assert _marked_(tab) == set()
+    mask[1, 2] = mask[2, 0] = True
+    tab.markCells(RED, np.nonzero(mask))
+    assert _marked_(tab) == {(1, 2), (2, 0)}
+    tab = table.Table(3, 4, None, 40)
+    tab.markCells(RED, mask)
+    assert _marked_(tab) == {(1, 2), (2, 0)}
+    with pytest.raises(Exception):
+        tab.markCells(RED, np.zeros((2, 4), dtype=bool))
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+
+'''
+@author:zjluestc@outlook.com
+@license:GPLv3
+'''
+
+import pytest
+
+import table
+
+'''
+返回：set((r, c)) 带有标记的单元格。
+'''
+def _marked_(tab):
+    return set((gid // tab._col, gid % tab._col) for gid in tab._cell_tcs.marked_cells())
+
+def _grid_(row, col):
+    return [[r*col + c for c in range(col)] for r in range(row)]
+
+def test_list_region_get():
+    tab = table.Table(4, 4, _grid_(4, 4), 40)
+    assert tab[1:3, 2] == [6, 10]
+    assert tab[0, [1, 3]] == [1, 3]
+    assert tab[[0, 2], [1, 3]] == [[1, 3], [9, 11]]
+    assert _marked_(tab) == {(1, 2), (2, 2), (0, 1), (0, 3), (2, 1), (2, 3)}
+    assert tab[3, 3] == 15
+
+def test_list_region_set():
+    tab = table.Table(3, 3, _grid_(3, 3), 40)
+    tab[0:2, 0:2] = 0
+    tab[2, :] = [7, 8, 9]
+    tab[[0, 2], [2]] = [[5], [6]]
+    assert tab._data == [[0, 0, 5], [0, 0, 5], [7, 8, 6]]
+    assert tab._text_update >= {0, 1, 3, 4, 6, 7, 8}
+
+def test_list_region_shape_error():
+    tab = table.Table(3, 3, _grid_(3, 3), 40)
+    for val in ([1, 2, 3], [[1], [2]], [[1, 2], 5], [[1, 2], 'ab']):
+        with pytest.raises(Exception):
+            tab[[0, 2], [1, 2]] = val
+        assert tab._data == _grid_(3, 3)
+
+def test_numpy_shares_data():
+    np = pytest.importorskip('numpy')
+    data = np.arange(12).reshape(3, 4)
+    tab = table.Table(3, 4, data, 40)
+    view = tab[0:2, 1:3]
+    data[0, 1] = 100
+    assert view[0, 0] == 100
+    tab[2, 0] = -1
+    assert data[2, 0] == -1
+
+def test_numpy_matches_list():
+    np = pytest.importorskip('numpy')
+    keys = [(slice(1, 3), [0, 2]), ([0, 2], [1, 3]), (1, [0, 3]), ([2, 0], 1), ([1], slice(None))]
+    for key in keys:
+        np_tab = table.Table(4, 4, np.arange(16).reshape(4, 4), 40)
+        list_tab = table.Table(4, 4, _grid_(4, 4), 40)
+        assert np.asarray(np_tab[key]).tolist() == list_tab[key]
+        assert _marked_(np_tab) == _marked_(list_tab)
+        value = np.asarray(list_tab[key]) + 100
+        np_tab[key] = value
+        list_tab[key] = value.tolist()
+        assert np_tab._data.tolist() == list_tab._data
+        assert np_tab._text_update == list_tab._text_update
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+
+'''
+@author:zjluestc@outlook.com
+@license:GPLv3
+'''
+
+import random
+
+import utility as util
+
+(RED, BLUE, GREEN) = ((255, 0, 0), (0, 0, 255), (0, 255, 0))
+
+def test_merge_frame_trace_expires_temporary_marks():
+    (trace, old) = (dict(), dict())
+    trace[(RED, False)] = {1, 2}
+    trace[(BLUE, True)] = {3}
+    (expired, touched) = util.merge_frame_trace(trace, old)
+    assert (expired, touched) == ({}, {1, 2, 3})
+    assert trace == {} and old == {RED: {1, 2}}
+    # 下一帧重新标记了元素2，只有元素1的临时标记过期。
+    trace[(RED, False)] = {2}
+    (expired, touched) = util.merge_frame_trace(trace, old)
+    assert (expired, touched) == ({RED: {1}}, {1, 2})
+    assert old == {RED: {2}}
+    (expired, touched) = util.merge_frame_trace(trace, old)
+    assert (expired, touched) == ({RED: {2}}, {2})
+    assert old == {}
+
+def test_merge_frame_trace_hold_keeps_mark():
+    (trace, old) = ({(RED, False): {1}}, dict())
+    util.merge_frame_trace(trace, old)
+    trace[(RED, True)] = {1}
+    (expired, _) = util.merge_frame_trace(trace, old)
+    assert expired == {} and old == {}
+
+def test_store_matches_stack():
+    rnd = random.Random(7)
+    colors = [RED, BLUE, GREEN]
+    store = util.TraceColorStore(20)
+    stacks = [util.TraceColorStack() for _ in range(20)]
+    for _ in range(2000):
+        (op, index, color) = (rnd.random(), rnd.randrange(20), rnd.choice(colors))
+        if op < 0.5:
+            store.add(index, color)
+            stacks[index].add(color)
+        elif op < 0.9:
+            assert store.remove(index, color) == stacks[index].remove(color)
+        else:
+            removed = store.remove_all(color)
+            assert removed == [i for i in range(20) if stacks[i].remove(color)]
+        for i in range(20):
+            assert store.color(i) == stacks[i].color()
+    assert store.marked_cells() == set(i for i in range(20) if len(stacks[i]._colors) > 0)
+
+def test_store_add_many_and_cells():
+    store = util.TraceColorStore(3)
+    store.add_many([0, 2], RED)
+    store.add(2, RED)
+    assert store.color(2) == RED and store.color(1) == (255, 255, 255)
+    store.add_cell(5)
+    assert 5 in store and 4 not in store
+    store.remove_cell(2)
+    assert 2 not in store
+    assert store.remove_all(RED) == [0]
+
+def test_remove_all_exclude():
+    store = util.TraceColorStore(3)
+    store.add_many([0, 1, 2], RED)
+    assert store.remove_all(RED, exclude=[1, 7]) == [0, 2]
+    assert store.color(1) == RED
+    assert store.marked_cells() == {1}
+    assert store.remove_all(RED) == [1]
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+
+'''
+@author:zjluestc@outlook.com
+@license:GPLv3
+'''
+
+import itertools
+
+import graph
+import link_list
+import tree
+import tree_layout
+import utility as util
+
+'''
+返回：list 按层次顺序排列的所有树节点。
+'''
+def _tree_nodes_(root):
+    nodes = list()
+    queue = [root]
+    while len(queue) > 0:
+        node = queue.pop(0)
+        nodes.append(node)
+        for child in (node.left, node.right):
+            if child is not None:
+                queue.append(child)
+    return nodes
+
+def _layout_(nodes, horizontal=False):
+    idmap = util.ConsecutiveIdMap(1)
+    layout = tree_layout.layout(nodes, idmap, horizontal)
+    return (layout, {node: layout.nodes[idmap.toConsecutiveId(node)] for node in nodes})
+
+def test_supported():
+    assert tree_layout.supported(_tree_nodes_(tree.parseTree([1, 2, 3])))
+    assert tree_layout.supported([link_list.ListNode(1)])
+    assert not tree_layout.supported([tree.TreeNode(1), graph.GraphNode(2)])
+
+def test_binary_tree_order():
+    root = tree.parseTree([1, 2, 3, 4, None, 6, 7])
+    (layout, pos) = _layout_(_tree_nodes_(root))
+    (left, right) = (root.left, root.right)
+    # y轴向上：父节点在子节点上方，左子节点在父节点左侧。
+    assert pos[root][1] > pos[left][1] == pos[right][1] > pos[left.left][1]
+    assert pos[left][0] < pos[root][0] < pos[right][0]
+    assert pos[right.left][0] < pos[right][0] < pos[right.right][0]
+    assert pos[left.left][0] < pos[left][0]
+
+def test_no_overlap_and_bounds():
+    root = tree.parseTree(list(range(1, 32)))
+    (layout, pos) = _layout_(_tree_nodes_(root))
+    for ((x1, y1, r1), (x2, y2, _)) in itertools.combinations(pos.values(), 2):
+        if y1 == y2:
+            assert abs(x1 - x2) >= tree_layout._node_sep - 0.001
+    for (x, y, r) in pos.values():
+        assert r <= x <= layout.width - r
+        assert r <= y <= layout.height - r
+
+def test_horizontal_list():
+    head = link_list.parseLinkList([5, 3, 8, 1])
+    nodes = list()
+    while head is not None:
+        nodes.append(head)
+        head = head.next
+    (layout, pos) = _layout_(nodes, horizontal=True)
+    xs = [pos[node][0] for node in nodes]
+    assert xs == sorted(xs) and len(set(xs)) == len(xs)
+    assert len(set(pos[node][1] for node in nodes)) == 1
+
+def test_empty():
+    (layout, _) = _layout_([])
+    assert (layout.width, layout.height, layout.nodes) == (0, 0, {})
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+
+'''
+@author:zjluestc@outlook.com
+@license:GPLv3
+'''
+
+import re
+import time
+
+import pytest
+
+from IPython import display
+
+import frame_sink
+import visual
+
+def _capture_(monkeypatch):
+    log = list()
+    def show(obj, display_id=None):
+        log.append((display_id, obj._repr_svg_() if hasattr(obj, '_repr_svg_') else repr(obj)))
+    monkeypatch.setattr(display, 'display', show)
+    monkeypatch.setattr(display, 'update_display', show)
+    return log
+
+def _frame_begins_(svg):
+    return re.findall(r'<set attributeName="opacity" to="1" begin="(-?[\d.]+)s"', svg)
+
+def test_shift_svg_begin():
+    svg = '<animate begin="0.50s" dur="1.00s"/><set begin="2.00s"/>'
+    assert frame_sink.shift_svg_begin(svg, -0.5) == '<animate begin="0.00s" dur="1.00s"/><set begin="1.50s"/>'
+    assert frame_sink.shift_svg_begin(svg, 0) is svg
+
+def test_fast_flush_does_not_wait(monkeypatch):
+    log = _capture_(monkeypatch)
+    viz = visual.Visualizer(0.5, fast=True, max_frames=5)
+    vec = viz.createVector([3, 1, 2])
+    start = time.time()
+    for _ in range(12):
+        vec.swap(0, 2)
+        viz.display()
+    viz.flush()
+    assert time.time() - start < 0.5
+    assert len(log) == 3
+    # 后输出的帧接在上一次输出还没有播放的帧之后，所有帧在同一条时间线上连续播放。
+    assert _frame_begins_(log[0][1]) == ['0.00', '0.50', '1.00', '1.50', '2.00']
+    assert len(_frame_begins_(log[2][1])) == 12
+
+class _ListSink():
+    def __init__(self):
+        self.frames = list()
+        self.closed = False
+
+    def write(self, frames, delay):
+        self.frames.append(frames)
+
+    def close(self):
+        self.closed = True
+
+@pytest.mark.parametrize('calls', [4, 5, 6])
+def test_skipped_frames_rendered_on_close(calls):
+    sink = _ListSink()
+    viz = visual.Visualizer(0.5, output=sink, display_every=3)
+    vec = viz.createVector([0])
+    for i in range(calls):
+        vec[0] = i + 1
+        viz.display()
+    viz.close()
+    assert sink.closed
+    assert len(sink.frames) == (calls + 2)//3 + (1 if (calls - 1) % 3 else 0)
+    (_, kind, svg) = sink.frames[-1][0]
+    assert kind == 'svg' and '>{}</text>'.format(calls) in svg
+    # 再次flush时没有需要补充输出的帧。
+    viz.flush()
+    assert len(sink.frames) == (calls + 2)//3 + (1 if (calls - 1) % 3 else 0)
+
+def test_skipped_frames_rendered_on_flush(monkeypatch):
+    log = _capture_(monkeypatch)
+    viz = visual.Visualizer(0.01, max_fps=1)
+    vec = viz.createVector([0])
+    for i in range(3):
+        vec[0] = i + 1
+        viz.display()
+    assert len(log) == 1
+    viz.flush()
+    assert len(log) == 2 and '>3</text>' in log[-1][1]